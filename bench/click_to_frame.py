@@ -0,0 +1,239 @@
+"""Click-to-first-frame benchmark, fully offline.
+
+Serves generated fixture media from a local shaped HTTP server, swaps the
+yt-dlp resolver for a fake one and drives the real app headlessly:
+
+    python -m bench.click_to_frame --runs 20 --media mp4 --latency 80 --bandwidth 20000
+    python -m bench.click_to_frame --target player --media dash
+
+Reports p50/p95 click -> VLC Playing, seek latency and resident memory per run.
+"""
+import argparse
+import threading
+import shutil
+import json
+import time
+import sys
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QTWEBENGINE_CHROMIUM_FLAGS', '--disable-gpu')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.media_server import MediaServer
+from bench.fixtures import ensure_fixtures
+from bench.fake_resolver import FakeResolveWorker
+from utils.PlaybackTracer import tracer
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline click-to-first-frame benchmark")
+    parser.add_argument('--target', choices=('app', 'player'), default='app',
+                        help="drive YouTubeApp.url_changed (default) or CustomVideoPlayer.play_video directly")
+    parser.add_argument('--media', choices=('mp4', 'dash', 'hls'), default='mp4')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0, help="per-request server latency in ms")
+    parser.add_argument('--bandwidth', type=float, default=0, help="per-connection cap in kbit/s, 0 = unlimited")
+    parser.add_argument('--resolve-delay', type=float, default=0, help="simulated extract_info time in ms")
+    parser.add_argument('--warm-cache', action='store_true', help="reuse one video ID so the info cache hits")
+    parser.add_argument('--seek-to', type=float, default=30, help="seek target in seconds, 0 disables")
+    parser.add_argument('--timeout', type=float, default=30, help="seconds to wait for each stage")
+    parser.add_argument('--json', help="write raw results to this file")
+    parser.add_argument('--trace', help="write a per-stage Chrome trace of every run to this file")
+    return parser.parse_args()
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # peak rather than current, but better than nothing off Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, pct):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def wait_for(qt_app, predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        qt_app.processEvents()
+        time.sleep(0.002)
+    return True
+
+class PlaybackProbe:
+    """Timestamps libVLC events on VLC's own thread, so the numbers don't include GUI latency"""
+
+    def __init__(self, media_player):
+        import vlc
+        self.media_player = media_player
+        self.playing = threading.Event()
+        self.playing_at = None
+        self.last_time = -1
+        self.time_at = 0
+        events = media_player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, self.on_playing)
+        events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self.on_time_changed)
+        self.events = events  # keep the callbacks alive
+
+    def reset(self):
+        self.playing.clear()
+        self.playing_at = None
+        self.last_time = -1
+        self.time_at = 0
+
+    def on_playing(self, event):
+        if not self.playing.is_set():
+            self.playing_at = time.perf_counter()
+            self.playing.set()
+
+    def on_time_changed(self, event):
+        self.last_time = event.u.new_time
+        self.time_at = time.perf_counter()
+
+def measure_seek(qt_app, player, probe, args):
+    """Time from seek request until playback has moved past the target"""
+    if not args.seek_to or args.media == 'hls':
+        return None
+    if not wait_for(qt_app, lambda: probe.last_time > 1000, args.timeout):
+        return None
+    target = int(args.seek_to * 1000)
+    started = time.perf_counter()
+    player.seek_to_time(target)
+    if not wait_for(qt_app, lambda: probe.time_at > started and probe.last_time >= target + 200, args.timeout):
+        return None
+    return probe.time_at - started
+
+def stream_urls(base_url, media):
+    if media == 'mp4':
+        return [f'{base_url}/video.mp4', f'{base_url}/audio.m4a']
+    if media == 'dash':
+        return [f'{base_url}/dash/manifest.mpd']
+    return [f'{base_url}/hls/index.m3u8']
+
+def run_app(qt_app, args):
+    from core.youtube_app import YouTubeApp
+    from PyQt5.QtCore import QUrl
+    window = YouTubeApp()
+    window.show()
+    wait_for(qt_app, lambda: False, 0.5)
+    window.warm_up()
+    player = window.video_player
+    probe = PlaybackProbe(player.media_player)
+    # IDs are unique per invocation, so cached fixture URLs from an earlier server port never get reused
+    session = f'{int(time.time()) % 100000:05d}'
+    results = []
+    try:
+        for run in range(args.runs):
+            video_id = f'bw{session}warm' if args.warm_cache else f'b{session}{run:05d}'
+            probe.reset()
+            clicked = time.perf_counter()
+            window.url_changed(QUrl(f'https://www.youtube.com/watch?v={video_id}'))
+            started = wait_for(qt_app, probe.playing.is_set, args.timeout)
+            results.append({
+                'run': run,
+                'click_to_playing': probe.playing_at - clicked if started else None,
+                'seek': measure_seek(qt_app, player, probe, args) if started else None,
+                'rss_mb': rss_mb(),
+            })
+            print_run(results[-1])
+            window.return_to_youtube()
+            wait_for(qt_app, lambda: False, 0.3)
+    finally:
+        window.resolver.shutdown()
+    return results
+
+def run_player(qt_app, args, base_url):
+    from core.video_player import CustomVideoPlayer
+    player = CustomVideoPlayer()
+    player.show()
+    probe = PlaybackProbe(player.media_player)
+    urls = stream_urls(base_url, args.media)
+    results = []
+    for run in range(args.runs):
+        player.stop()
+        wait_for(qt_app, lambda: False, 0.3)
+        probe.reset()
+        tracer.begin_session(f'player{run:05d}')
+        clicked = time.perf_counter()
+        player.play_video(urls, 'https://www.youtube.com/watch?v=benchplayer', is_live=args.media == 'hls')
+        started = wait_for(qt_app, probe.playing.is_set, args.timeout)
+        results.append({
+            'run': run,
+            'click_to_playing': probe.playing_at - clicked if started else None,
+            'seek': measure_seek(qt_app, player, probe, args) if started else None,
+            'rss_mb': rss_mb(),
+        })
+        print_run(results[-1])
+    player.stop()
+    return results
+
+def fmt_ms(seconds):
+    return "   timeout" if seconds is None else f"{seconds * 1000:7.0f} ms"
+
+def print_run(result):
+    print(f"run {result['run']:3d}: playing {fmt_ms(result['click_to_playing'])}  "
+          f"seek {fmt_ms(result['seek'])}  rss {result['rss_mb']:.0f} MB")
+
+def summarize(results, args):
+    startup = [r['click_to_playing'] for r in results]
+    seeks = [r['seek'] for r in results]
+    memory = [r['rss_mb'] for r in results]
+    print(f"\n{args.target}/{args.media}, {args.runs} runs, latency {args.latency:g} ms, "
+          f"bandwidth {args.bandwidth or 'unlimited'} kbit/s, resolve {args.resolve_delay:g} ms")
+    print(f"  click -> Playing  p50 {fmt_ms(percentile(startup, 50))}  p95 {fmt_ms(percentile(startup, 95))}"
+          f"  ({sum(s is None for s in startup)} timed out)")
+    if any(s is not None for s in seeks):
+        print(f"  seek             p50 {fmt_ms(percentile(seeks, 50))}  p95 {fmt_ms(percentile(seeks, 95))}")
+    print(f"  rss              first {memory[0]:.0f} MB  last {memory[-1]:.0f} MB  "
+          f"growth/run {(memory[-1] - memory[0]) / max(1, len(memory) - 1):.1f} MB")
+
+def main():
+    args = parse_args()
+    if args.trace:
+        tracer.enable(args.trace)
+    server = MediaServer(ensure_fixtures(), args.latency, args.bandwidth).start()
+    print(f"Serving fixtures on {server.base_url}")
+
+    FakeResolveWorker.base_url = server.base_url
+    FakeResolveWorker.media = args.media
+    FakeResolveWorker.resolve_delay = args.resolve_delay / 1000.0
+    from utils.StreamResolver import StreamResolver
+    from core.video_player import CustomVideoPlayer
+    StreamResolver.worker_class = FakeResolveWorker
+    # No window system to embed into - decode everything but render nowhere
+    CustomVideoPlayer.extra_vlc_args = ['--vout=dummy', '--aout=dummy']
+
+    if args.target == 'app':
+        import core.youtube_app  # QtWebEngine has to be loaded before the QApplication exists
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QStandardPaths
+    # Bandwidth history, caching tuning and the caches go to Qt's test location, never the user's
+    # AppData: localhost throughput would otherwise steer real format choice afterwards
+    QStandardPaths.setTestModeEnabled(True)
+    qt_app = QApplication(sys.argv[:1])
+    data_path = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    shutil.rmtree(data_path, ignore_errors=True)  # left over from a run that crashed
+    try:
+        if args.target == 'app':
+            results = run_app(qt_app, args)
+        else:
+            results = run_player(qt_app, args, server.base_url)
+    finally:
+        server.stop()
+        shutil.rmtree(data_path, ignore_errors=True)
+    summarize(results, args)
+    if args.trace:
+        tracer.export()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
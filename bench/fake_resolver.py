@@ -0,0 +1,48 @@
+from utils.ResolveWorker import ResolveWorker
+import time
+
+class FakeResolveWorker(ResolveWorker):
+    """Stands in for yt-dlp: answers every video ID with fixture URLs on the local media server"""
+    base_url = ''
+    media = 'mp4'  # mp4 (separate video/audio files), dash or hls
+    resolve_delay = 0.0  # seconds, to model extract_info cost
+
+    def warm_up(self):
+        pass  # nothing to connect to
+
+    def extract(self, video_id):
+        # Sleep in slices so a superseded request still aborts like a real extraction would
+        deadline = time.time() + self.resolve_delay
+        while time.time() < deadline:
+            self.ydl_opts['logger'].debug(f"[fake] {video_id}: resolving")
+            time.sleep(min(0.05, max(0, deadline - time.time())))
+        return self.fake_info(video_id)
+
+    def fake_info(self, video_id):
+        info = {
+            'id': video_id,
+            'title': f"Benchmark {video_id}",
+            'description': "Offline benchmark fixture",
+            'duration': 60,
+            'is_live': False,
+            '__comment_continuation': {'ytcfg': {}, 'video_id': video_id, 'contents': []},
+        }
+        if self.media == 'mp4':
+            info['formats'] = [
+                {'format_id': 'bench-audio', 'url': f'{self.base_url}/audio.m4a', 'protocol': 'http',
+                 'ext': 'm4a', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 128},
+                {'format_id': 'bench-video', 'url': f'{self.base_url}/video.mp4', 'protocol': 'http',
+                 'ext': 'mp4', 'acodec': 'none', 'vcodec': 'avc1.64001f', 'height': 720, 'fps': 30, 'vbr': 2500},
+            ]
+            info['requested_formats'] = info['formats'][::-1]
+            info['url'] = info['formats'][1]['url']
+        elif self.media == 'dash':
+            info['url'] = f'{self.base_url}/dash/manifest.mpd'
+        else:
+            # HLS goes down the live path, the only place the app hands VLC a single muxed stream
+            info['is_live'] = True
+            info['formats'] = [
+                {'format_id': 'bench-hls', 'url': f'{self.base_url}/hls/index.m3u8', 'protocol': 'm3u8_native',
+                 'ext': 'mp4', 'acodec': 'mp4a.40.2', 'vcodec': 'avc1.64001f', 'height': 720, 'tbr': 2628},
+            ]
+        return info
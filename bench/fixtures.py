@@ -0,0 +1,49 @@
+import subprocess
+import shutil
+import os
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DURATION = 60  # seconds, long enough for a mid-file seek
+
+def find_ffmpeg():
+    # Same layout the app uses for downloads, then whatever is on PATH
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for name in ('ffmpeg.exe', 'ffmpeg'):
+        bundled = os.path.join(script_dir, 'ffmpeg', 'bin', name)
+        if os.path.exists(bundled):
+            return bundled
+    return shutil.which('ffmpeg')
+
+def ensure_fixtures(root=FIXTURE_DIR):
+    """Generate the test-pattern MP4/M4A pair, a DASH and an HLS rendition once, reuse them afterwards"""
+    wanted = [
+        os.path.join(root, 'video.mp4'),
+        os.path.join(root, 'audio.m4a'),
+        os.path.join(root, 'dash', 'manifest.mpd'),
+        os.path.join(root, 'hls', 'index.m3u8'),
+    ]
+    if all(os.path.exists(path) for path in wanted):
+        return root
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg is needed once to generate the benchmark fixtures")
+    os.makedirs(os.path.join(root, 'dash'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'hls'), exist_ok=True)
+    source = [
+        '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={DURATION}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=44100:duration={DURATION}',
+    ]
+    video = ['-c:v', 'libx264', '-preset', 'veryfast', '-b:v', '2500k', '-g', '60', '-pix_fmt', 'yuv420p']
+    audio = ['-c:a', 'aac', '-b:a', '128k']
+    jobs = [
+        # Separate video-only and audio-only files, like the googlevideo DASH formats yt-dlp returns
+        source + ['-map', '0:v'] + video + ['-movflags', '+faststart', wanted[0]],
+        source + ['-map', '1:a'] + audio + ['-movflags', '+faststart', wanted[1]],
+        source + ['-map', '0:v', '-map', '1:a'] + video + audio + ['-f', 'dash', '-seg_duration', '2', wanted[2]],
+        source + ['-map', '0:v', '-map', '1:a'] + video + audio + [
+            '-f', 'hls', '-hls_time', '2', '-hls_playlist_type', 'vod', wanted[3]],
+    ]
+    for job in jobs:
+        print(f"Generating {os.path.relpath(job[-1], root)}")
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error'] + job, check=True)
+    return root
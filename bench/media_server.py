@@ -0,0 +1,103 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import mimetypes
+import threading
+import time
+import os
+import re
+
+mimetypes.add_type('application/dash+xml', '.mpd')
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/iso.segment', '.m4s')
+mimetypes.add_type('audio/mp4', '.m4a')
+
+class ShapedMediaHandler(BaseHTTPRequestHandler):
+    """Static file handler with Range support, a fixed per-request latency and a per-connection bandwidth cap"""
+    protocol_version = 'HTTP/1.1'
+    CHUNK = 16 * 1024
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def serve(self, send_body):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        path = os.path.normpath(os.path.join(server.root, self.path.split('?', 1)[0].lstrip('/')))
+        if os.path.commonpath([path, server.root]) != server.root or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if not send_body:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            began = time.perf_counter()
+            sent = 0
+            try:
+                while remaining > 0:
+                    data = f.read(min(self.CHUNK, remaining))
+                    if not data:
+                        break
+                    self.wfile.write(data)
+                    remaining -= len(data)
+                    sent += len(data)
+                    if server.bandwidth:
+                        # Sleep off whatever we are ahead of the configured rate
+                        ahead = sent / server.bandwidth - (time.perf_counter() - began)
+                        if ahead > 0:
+                            time.sleep(ahead)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # VLC drops connections on every seek
+
+class MediaServer(ThreadingHTTPServer):
+    """Local stand-in for googlevideo serving the bench fixtures"""
+    daemon_threads = True
+
+    def __init__(self, root, latency_ms=0, bandwidth_kbps=0, port=0):
+        super().__init__(('127.0.0.1', port), ShapedMediaHandler)
+        self.root = os.path.abspath(root)
+        self.latency = latency_ms / 1000.0
+        self.bandwidth = bandwidth_kbps * 1000 / 8.0  # bytes per second, 0 = unlimited
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -1,22 +1,36 @@
 import time
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                           QSlider, QStyle, QLabel, QSizePolicy, QScrollArea, 
-                          QTextBrowser, QToolTip, QApplication, QFileDialog) 
-from PyQt5.QtCore import Qt, QTime, QUrl, QSize, QTimer, QRect, QThread, pyqtSignal, QMetaObject
+                          QTextBrowser, QToolTip, QApplication, QFileDialog, QListView, QMenu) 
+from PyQt5.QtCore import Qt, QTime, QUrl, QSize, QTimer, QRect, QThread, pyqtSignal, QMetaObject, QStandardPaths
 from PyQt5.QtGui import QIcon, QPainter, QColor, QPixmap, QCursor
 import vlc
 import os
-from core.file_explorer import FileExplorerDialog
-from utils.Downloader import Downloader
+from urllib.parse import urlparse, parse_qs
+from utils.DownloadManager import DownloadManager
+from utils.InfoCache import InfoCache
+from utils.ImageLoader import ImageLoader
+from utils.CommentModel import CommentListModel, CommentDelegate
+from utils.PlaybackTracer import tracer
+from utils.VlcEventBridge import VlcEventBridge
+from utils.CachingController import CachingController
 import sys
-import base64
-import requests
 # The video player class - absolute cancer to work with so goodluck!
 class CustomVideoPlayer(QWidget):
     playbackFinished = pyqtSignal()  # Add signal definition
+    surface_changed = pyqtSignal(int, int)  # physical px of the video surface after fullscreen/theater toggles
+    audio_only_requested = pyqtSignal(bool)  # the audio-only button, the app picks the streams
+    nearing_end = pyqtSignal()  # once per video, time to pre-roll whatever plays next
+    advanced = pyqtSignal(str)  # switched to the pre-rolled video (its YouTube URL) at the end of the last one
+    PREROLL_LEAD = 45000  # ms before the end at which the next video is opened
+    extra_vlc_args = []  # e.g. dummy outputs for the headless benchmark
 
-    def __init__(self):
+    def __init__(self, bandwidth_estimator=None, stream_proxy=None, caching_controller=None):
         super().__init__()
+        self.bandwidth_estimator = bandwidth_estimator
+        self.stream_proxy = stream_proxy  # RangeProxy VLC reads VOD streams through, if any
+        # Per-host caching windows; without a history file it still adapts within the run
+        self.caching_controller = caching_controller or CachingController()
         # Add always-on-top flag
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
         self.layout = QVBoxLayout(self)
@@ -111,6 +125,19 @@ class CustomVideoPlayer(QWidget):
         self.download_button.clicked.connect(self.download_video)
         header_layout.addWidget(self.download_button)
 
+        # Downloads run in the background, a few at a time, whatever is playing
+        self.download_manager = DownloadManager(bandwidth_estimator, stream_proxy, parent=self)
+        self.playback_session = None  # set by the app: returns its now_playing dict (info, streamed formats)
+        self.download_manager.job_progress.connect(self.on_download_progress)
+        self.download_manager.job_finished.connect(self.on_download_finished)
+        self.download_manager.job_failed.connect(self.download_error)
+        self.download_manager.job_processing.connect(self.on_download_processing)
+        # Right-click: cancel jobs, or queue existing files for conversion
+        for kind in ('video', 'mp3'):
+            button = self.download_button_for(kind)
+            button.setContextMenuPolicy(Qt.CustomContextMenu)
+            button.customContextMenuRequested.connect(lambda pos, k=kind: self.show_download_menu(k, pos))
+
         # Store both streaming and YouTube URLs
         self.current_video_url = ""
         self.youtube_url = ""
@@ -133,7 +160,7 @@ class CustomVideoPlayer(QWidget):
         ]
         
         try:
-            self.instance = vlc.Instance(' '.join(vlc_args))
+            self.instance = vlc.Instance(' '.join(vlc_args + self.extra_vlc_args))
             if not self.instance:
                 self.instance = vlc.Instance()
             self.media_player = self.instance.media_player_new()
@@ -143,30 +170,34 @@ class CustomVideoPlayer(QWidget):
             self.instance = vlc.Instance()
             self.media_player = self.instance.media_player_new()
         
-        # Set up event manager
-        self.event_manager = self.media_player.event_manager()
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self.on_playback_finished)
-        # Attach position-changed event to update slider continuously
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerPositionChanged, self.on_position_changed)
+        # VLC events arrive on VLC's threads, the bridge re-emits them on ours - nothing polls
+        self.vlc_events = VlcEventBridge(self.media_player, parent=self)
+        self.vlc_events.state_changed.connect(self.on_preroll_state)
+        self.connect_events(self.vlc_events)
         
         # Create container widget for VLC
-        self.video_widget = QWidget()
-        self.video_widget.setStyleSheet("background-color: black;")
-        self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.video_widget.setMinimumHeight(500)
-        
-        # Set video widget to use its winId for VLC
-        if sys.platform == "win32":
-            self.media_player.set_hwnd(int(self.video_widget.winId()))
-        else:
-            self.media_player.set_xwindow(int(self.video_widget.winId()))
-            
+        self.video_widget = self.create_surface()
+        self.attach_surface(self.media_player, self.video_widget)
         self.layout.addWidget(self.video_widget, 1)
-        
-        # Timer for updating position slider
-        self.update_timer = QTimer()
-        self.update_timer.setInterval(100)
-        self.update_timer.timeout.connect(self.update_position)
+
+        # A second player opens the next video paused while this one plays, the decks swap at the end
+        self.deck = {'player': self.media_player, 'widget': self.video_widget, 'bridge': self.vlc_events}
+        self.spare_deck = None  # built on the first pre-roll
+        self.preroll_deck = None
+        self.end_handled = False
+        self.near_end_reported = False
+
+        # Stands in for the video while only the audio stream is played
+        self.thumbnail_label = QLabel()
+        self.thumbnail_label.setStyleSheet("background-color: black;")
+        self.thumbnail_label.setAlignment(Qt.AlignCenter)
+        self.thumbnail_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.thumbnail_label.setMinimumHeight(500)
+        self.thumbnail_label.hide()
+        self.layout.addWidget(self.thumbnail_label, 1)
+        self.thumbnail_loader = None  # built on first use, most sessions never need it
+        self.thumbnail_url = None
+        self.audio_only = False
         
         # Optionally disable custom control events for testing:
         self.use_custom_controls = False  # Set to True to enable custom controls
@@ -243,6 +274,14 @@ class CustomVideoPlayer(QWidget):
         self.volume_slider.setValue(100)
         self.volume_slider.setMaximumWidth(100)
         self.volume_slider.valueChanged.connect(self.set_volume)
+
+        # Audio-only: listen without fetching or decoding video
+        self.audio_only_button = QPushButton()
+        self.audio_only_button.setIcon(self.style().standardIcon(QStyle.SP_DriveCDIcon))
+        self.audio_only_button.setCheckable(True)
+        self.audio_only_button.setCursor(Qt.PointingHandCursor)
+        self.audio_only_button.setToolTip("Audio Only")
+        self.audio_only_button.clicked.connect(self.audio_only_requested.emit)
         
         # Add fullscreen button after volume controls
         self.fullscreen_button = QPushButton()
@@ -278,6 +317,7 @@ class CustomVideoPlayer(QWidget):
         self.controls_layout.addWidget(self.forward_button)
         self.controls_layout.addWidget(self.volume_button)
         self.controls_layout.addWidget(self.volume_slider)
+        self.controls_layout.addWidget(self.audio_only_button)
         # Move theater and fullscreen buttons to end
         self.controls_layout.addWidget(self.theater_button)
         self.controls_layout.addWidget(self.fullscreen_button)
@@ -320,16 +360,27 @@ class CustomVideoPlayer(QWidget):
         comments_layout = QVBoxLayout(comments_container)
         comments_layout.setContentsMargins(15, 0, 15, 0)  # Remove vertical padding
         
-        self.comments_area = QTextBrowser()
+        # Comments live in a model/delegate list so only the rows on screen are laid out
+        data_path = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+        self.image_loader = ImageLoader(data_path + "/avatar_cache", parent=self)
+        self.comments_area = QListView()
         self.comments_area.setMaximumHeight(90)  # Reduced from 150
         self.comments_area.setStyleSheet("""
-            QTextBrowser {
+            QListView {
                 background-color: #282828;
                 color: white;
                 border: none;
                 padding: 8px;
             }
         """)
+        self.comment_model = CommentListModel(self.image_loader, self)
+        self.comments_area.setModel(self.comment_model)
+        self.comments_area.setItemDelegate(CommentDelegate(self.comments_area))
+        self.comments_area.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.comments_area.setResizeMode(QListView.Adjust)
+        self.comments_area.setLayoutMode(QListView.Batched)
+        self.comments_area.setSelectionMode(QListView.NoSelection)
+        self.comments_area.setMouseTracking(True)
         comments_layout.addWidget(self.comments_area)
         bottom_layout.addWidget(comments_container)
         
@@ -348,6 +399,12 @@ class CustomVideoPlayer(QWidget):
         self.forward_button.setStyleSheet(button_style)
         self.volume_button.setStyleSheet(button_style)
         self.fullscreen_button.setStyleSheet(button_style)
+        self.audio_only_button.setStyleSheet(button_style + """
+            QPushButton:checked {
+                background-color: #FF0000;
+                border-radius: 15px;
+            }
+        """)
         
         # Make control icons white
         self.set_white_icon = lambda button, icon_type: self._create_white_icon(button, icon_type)
@@ -379,15 +436,15 @@ class CustomVideoPlayer(QWidget):
             }
         """)
 
-        # Add buffering timer
-        self.buffer_timer = QTimer()
-        self.buffer_timer.setInterval(500)  # Check every 500ms
-        self.buffer_timer.timeout.connect(self.check_buffering)
         self.is_buffering = False
-        
-        # Track last position for sync checking
-        self.last_position = 0
         self.stall_count = 0
+        self.is_live = False
+        self.audio_track_checked = False
+
+        # Read-rate tracking while VLC fills its buffers, fed to the bandwidth estimator
+        self.throughput_started = 0
+        self.throughput_last = None  # (time, read_bytes)
+        self.throughput_peak = 0
 
         self.last_seek_time = 0  # New attribute to track when user last sought
         self.consecutive_buffer_count = 0
@@ -398,6 +455,37 @@ class CustomVideoPlayer(QWidget):
         # Replace local comments_container with an attribute:
         self.comments_container = comments_container  # NEW: enable toggling later
 
+    def create_surface(self):
+        widget = QWidget()
+        widget.setStyleSheet("background-color: black;")
+        widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        widget.setMinimumHeight(500)
+        return widget
+
+    @staticmethod
+    def attach_surface(media_player, widget):
+        # Set video widget to use its winId for VLC
+        if sys.platform == "win32":
+            media_player.set_hwnd(int(widget.winId()))
+        else:
+            media_player.set_xwindow(int(widget.winId()))
+
+    def connect_events(self, bridge, connect=True):
+        """(Dis)connect the playing deck's event bridge to the controls"""
+        pairs = [
+            (bridge.time_changed, self.on_time_changed),
+            (bridge.length_changed, self.on_length_changed),
+            (bridge.state_changed, self.on_state_changed),
+            (bridge.buffering, self.on_buffering),
+            (bridge.end_reached, self.on_playback_finished),
+            (bridge.stalled, self.on_stalled),
+        ]
+        for signal, slot in pairs:
+            if connect:
+                signal.connect(slot)
+            else:
+                signal.disconnect(slot)
+
     def _create_white_icon(self, button, icon_type):
         """Helper method to create white icons"""
         icon = self.style().standardIcon(icon_type)
@@ -428,6 +516,53 @@ class CustomVideoPlayer(QWidget):
             self.comments_area.show()
             self.set_white_icon(self.fullscreen_button, QStyle.SP_TitleBarMaxButton)
             self.is_fullscreen = False
+        self.report_surface()
+
+    def surface_size(self):
+        """Video surface in physical pixels, or None while it isn't laid out"""
+        if not self.video_widget.isVisible():
+            return None
+        self.layout.activate()
+        ratio = self.video_widget.devicePixelRatioF()
+        return int(self.video_widget.width() * ratio), int(self.video_widget.height() * ratio)
+
+    def report_surface(self):
+        # The window manager resizes asynchronously, measure once it has settled
+        QTimer.singleShot(300, self.emit_surface)
+
+    def emit_surface(self):
+        surface = self.surface_size()
+        if surface:
+            self.surface_changed.emit(*surface)
+
+    def set_audio_only(self, enabled, thumbnail_url=None):
+        """Show the thumbnail instead of the video surface; the caller switches the streams"""
+        self.audio_only = enabled
+        self.audio_only_button.setChecked(enabled)
+        if enabled and self.is_fullscreen:
+            self.toggle_fullscreen()
+        self.video_widget.setVisible(not enabled)
+        self.thumbnail_label.setVisible(enabled)
+        self.fullscreen_button.setEnabled(not enabled)
+        self.thumbnail_label.clear()
+        self.thumbnail_url = thumbnail_url if enabled else None
+        if not self.thumbnail_url:
+            return
+        if self.thumbnail_loader is None:
+            data_path = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+            self.thumbnail_loader = ImageLoader(data_path + "/thumbnail_cache", size=720, max_workers=1,
+                                                max_memory=8, parent=self)
+            self.thumbnail_loader.image_ready.connect(self.on_thumbnail_ready)
+        image = self.thumbnail_loader.get(self.thumbnail_url)
+        if image is not None:
+            self.on_thumbnail_ready(self.thumbnail_url, image)
+
+    def on_thumbnail_ready(self, url, image):
+        if url != self.thumbnail_url:
+            return  # the thumbnail of a video that is no longer playing
+        pixmap = QPixmap.fromImage(image)
+        self.thumbnail_label.setPixmap(pixmap.scaled(self.thumbnail_label.size(), Qt.KeepAspectRatio,
+                                                     Qt.SmoothTransformation))
 
     def handle_key_press(self, event):
         """Handle keyboard events for toggling fullscreen."""
@@ -458,11 +593,9 @@ class CustomVideoPlayer(QWidget):
         if self.media_player.is_playing():
             self.media_player.pause()
             self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
-            self.update_timer.stop()
         else:
             self.media_player.play()
             self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
-            self.update_timer.start()
 
     def seek_relative(self, offset_ms):
         """Seek relative to current position"""
@@ -482,6 +615,7 @@ class CustomVideoPlayer(QWidget):
                 # Keep within bounds
                 time_ms = max(0, min(time_ms, length))
                 self.media_player.set_time(time_ms)
+                self.last_seek_time = time.time()
         except Exception as e:
             print(f"Absolute seek error: {str(e)}")
 
@@ -511,43 +645,54 @@ class CustomVideoPlayer(QWidget):
             self.media_player.set_time(value)
             self.time_label.setText(self.format_time(value))
 
-    def update_position(self):
-        if not self.media_player.is_playing() or self.is_scrubbing:
+    def on_time_changed(self, current_time):
+        self.sample_throughput()
+        self.caching_controller.sample(self.media_stats())
+        if self.is_live or self.is_scrubbing or current_time < 0:
             return
-        # New: check if VLC has reached an ended state (for streaming videos that eventually end)
-        if not self.is_live and self.media_player.get_state() == vlc.State.Ended:
-            self.on_playback_finished(None)
-            return
-        try:
-            current_time = self.media_player.get_time()
-            if self.is_live:
-                return
-            total_length = self.media_player.get_length()
-            if current_time >= 0 and total_length > 0:
-                self.seek_slider.blockSignals(True)
-                self.seek_slider.setMaximum(total_length)
-                self.seek_slider.setValue(current_time)
-                self.seek_slider.blockSignals(False)
-                self.time_label.setText(self.format_time(current_time))
-                self.duration_label.setText(self.format_time(total_length))
-                if not self.is_live and current_time >= total_length - 500:
-                    self.stop()
-                    self.hide()
-                    self.playbackFinished.emit()
-                    return
-                if current_time % 5000 == 0:
-                    tracks = self.media_player.audio_get_track_description()
-                    if tracks and self.media_player.audio_get_track() <= 0:
-                        self.media_player.audio_set_track(1)
-        except Exception as e:
-            print(f"Position update error: {e}")
-
-    def on_position_changed(self, event):
-        # Update slider based on VLC position events
-        current_time = self.media_player.get_time()
         self.seek_slider.blockSignals(True)
         self.seek_slider.setValue(current_time)
         self.seek_slider.blockSignals(False)
+        self.time_label.setText(self.format_time(current_time))
+        total_length = self.seek_slider.maximum()
+        # Short videos still get their first seconds to themselves before the next one competes for the link
+        preroll_at = max(total_length - self.PREROLL_LEAD, min(10000, total_length // 2))
+        if total_length > 0 and not self.near_end_reported and current_time >= preroll_at:
+            self.near_end_reported = True
+            self.nearing_end.emit()
+        # Streams often stop short of EndReached, so treat the last half second as the end
+        if total_length > 0 and current_time >= total_length - 500:
+            self.on_playback_finished()
+
+    def on_length_changed(self, total_length):
+        if self.is_live or total_length <= 0:
+            return
+        self.seek_slider.setMaximum(total_length)
+        self.duration_label.setText(self.format_time(total_length))
+
+    def on_state_changed(self, state):
+        self.caching_controller.playing(state == 'playing')
+        if state == 'playing':
+            self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
+            if not self.audio_track_checked:
+                # Some DASH pairs come up with audio disabled
+                self.audio_track_checked = True
+                tracks = self.media_player.audio_get_track_description()
+                if tracks and self.media_player.audio_get_track() <= 0:
+                    self.media_player.audio_set_track(1)
+        elif state in ('paused', 'stopped'):
+            self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        elif state == 'error':
+            print("VLC reported a playback error")
+
+    def on_buffering(self, cache):
+        self.sample_throughput()
+
+    def on_stalled(self, duration_ms):
+        if time.time() - self.last_seek_time < 3:
+            return  # refilling after a seek isn't the network's fault
+        print(f"Playback stalled for {duration_ms} ms")
+        self.caching_controller.stalled(duration_ms)
 
     def set_volume(self, volume):
         self.media_player.audio_set_volume(volume)
@@ -577,145 +722,216 @@ class CustomVideoPlayer(QWidget):
             self.volume_button.setIcon(QIcon(pixmap))
 
     def update_comments(self, comments):
-        self.comments_area.clear()
-        if not comments:
-            self.comments_area.setText("No comments available")
-            return
-            
-        # Prepare HTML template with styling for author thumbnail
-        html_template = """
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                color: #FFFFFF;
-                background-color: #282828;
-                margin: 0;
-                padding: 10px;
-            }
-            .comment {
-                background: #333;
-                border-radius: 8px;
-                padding: 10px;
-                margin-bottom: 10px;
-            }
-            .comment-header {
-                display: flex;
-                align-items: center;
-            }
-            .thumb {
-                margin-right: 5px;
-                border-radius: 50%;
-                width: 20px;
-                height: 20px;
-                vertical-align: middle;
-            }
-            .author {
-                font-weight: bold;
-                color: #FF4500;
-                margin-right: 5px;
-            }
-            .likes {
-                color: #AAAAAA;
-                font-size: 12px;
-            }
-            .text {
-                margin-top: 5px;
-                line-height: 1.5;
-            }
-        </style>
-        """
-        
-        def get_data_uri(url):
-            try:
-                response = requests.get(url)
-                if response.status_code == 200:
-                    data = base64.b64encode(response.content).decode("utf-8")
-                    mime = response.headers.get("Content-Type", "image/png")
-                    return f"data:{mime};base64,{data}"
-            except Exception as e:
-                print(f"Error fetching image: {e}")
-            return "https://via.placeholder.com/40"
-
-        # Build comments HTML with thumbnail conversion
-        comments_html = []
-        for comment in comments[:10]:
-            author = comment.get('author', 'Anonymous')
-            text = comment.get('text', '').replace('\n', '<br>')
-            likes = comment.get('like_count', 0)
-            thumb_url = comment.get('author_thumbnail', '')
-            thumb = get_data_uri(thumb_url) if thumb_url else "https://via.placeholder.com/20"
-            
-            comments_html.append(f"""
-                <div class="comment">
-                    <div class="comment-header">
-                        <img class="thumb" src="{thumb}" alt="thumbnail" width="20" height="20"/>
-                        <span class="author">{author}</span>
-                        <span class="likes">• {likes} likes</span>
-                    </div>
-                    <div class="text">{text}</div>
-                </div>
-            """)
-        
-        full_html = html_template + ''.join(comments_html)
-        self.comments_area.setHtml(full_html)
+        # Every fetched comment is handed over; the view only lays out what is on screen
+        self.comment_model.set_comments(comments)
 
-    def play_video(self, stream_urls, youtube_url, is_live=False):
+    def switch_streams(self, stream_urls):
+        """Reopen the current VOD from other stream URLs at the current position"""
+        position = self.media_player.get_time()
+        self.play_video(stream_urls, self.youtube_url, start_ms=max(position, 0))
+
+    def play_video(self, stream_urls, youtube_url, is_live=False, start_ms=0):
+        tracer.instant('play_video', streams=len(stream_urls), live=is_live)
         try:
             self.current_video_url = stream_urls[0]
             self.youtube_url = youtube_url
             self.is_live = is_live
 
-            if is_live:
-                media_opts = [
-                    ":demux=hls",
-                    ":live-caching=5000",
-                    ":hls-live-edge=9999"
-                ]
-            else:
-                # For VOD, expect dual-stream URLs from yt-dlp
-                media_opts = []
-            media = self.instance.media_new(stream_urls[0])
-            # Use bestaudio URL if provided (dual stream 1080p)
-            if len(stream_urls) > 1:
-                media.add_option(f":input-slave={stream_urls[1]}")
-            for opt in media_opts:
-                media.add_option(opt)
-            self.media_player.set_media(media)
-            self.media_player.audio_set_volume(self.volume_slider.value())
-            self.media_player.play()
+            # Caching window learned from earlier sessions against the same host
+            caching = self.caching_controller.begin(self.origin_url(stream_urls[0]), is_live)
+            media_opts = [f":start-time={start_ms / 1000:.3f}"] if start_ms else []
+            media, proxied = self.build_media(stream_urls, youtube_url, is_live, caching, media_opts)
+            self.record_throughput()
+            self.vlc_events.clear()
+            self.audio_track_checked = False
+            self.end_handled = False
+            self.near_end_reported = False
+            self.seek_slider.setMaximum(0)
+            with tracer.span('vlc set_media + play'):
+                self.media_player.set_media(media)
+                # Reads from localhost say nothing about the link, the proxy measures it instead
+                self.throughput_started = 0 if proxied else time.time()
+                self.media_player.audio_set_volume(self.volume_slider.value())
+                self.media_player.play()
 
-            # Force audio synchronization check after a longer delay
-            QTimer.singleShot(3000, self.check_audio_sync)
+            if len(stream_urls) > 1:
+                # Separate audio input can drift, force audio synchronization check after a longer delay
+                QTimer.singleShot(3000, self.check_audio_sync)
 
-            self.update_timer.start()
-            self.comments_area.setText("Loading comments...")
-            self.buffer_timer.start()
+            if not start_ms:
+                self.comment_model.set_status("Loading comments...")
         except Exception as e:
             print(f"Playback error: {str(e)}")
 
+    def origin_url(self, url):
+        return self.stream_proxy.upstream_url(url) if self.stream_proxy else url
+
+    def build_media(self, stream_urls, youtube_url, is_live, caching, extra_opts=()):
+        """vlc.Media for the stream URLs, and whether VLC will read it through the local proxy"""
+        if is_live:
+            media_opts = [
+                ":demux=hls",
+                f":live-caching={caching}",
+                f":network-caching={caching}",
+                ":hls-live-edge=9999"
+            ]
+        else:
+            # For VOD, expect dual-stream URLs from yt-dlp
+            media_opts = [f":network-caching={caching}"]
+        if self.stream_proxy and not is_live and all(self.is_progressive(u) for u in stream_urls):
+            # VLC reads through the local chunk cache, seeks back and replays never hit the network
+            video_id = parse_qs(urlparse(youtube_url).query).get('v', [None])[0]
+            stream_urls = [self.stream_proxy.url_for(u, video_id) for u in stream_urls]
+        proxied = bool(self.stream_proxy) and stream_urls[0].startswith(self.stream_proxy.base_url)
+        media = self.instance.media_new(stream_urls[0])
+        # Use bestaudio URL if provided (dual stream 1080p)
+        if len(stream_urls) > 1:
+            media.add_option(f":input-slave={stream_urls[1]}")
+        for opt in media_opts + list(extra_opts):
+            media.add_option(opt)
+        return media, proxied
+
+    def preroll(self, stream_urls, youtube_url):
+        """Open the next VOD paused on the spare player, so it has buffered by the time this one ends"""
+        self.cancel_preroll()
+        try:
+            deck = self.spare_deck or self.create_deck()
+            self.spare_deck = None
+            caching = self.caching_controller.caching_for(self.origin_url(stream_urls[0]), False)
+            # start-paused keeps demuxing until the buffer is full, then holds on the first frame
+            media, _ = self.build_media(stream_urls, youtube_url, False, caching, [":start-paused"])
+            deck.update(urls=stream_urls, youtube_url=youtube_url)
+            self.preroll_deck = deck
+            deck['player'].set_media(media)
+            deck['player'].play()
+            tracer.instant('up next: pre-roll', youtube_url=youtube_url)
+        except Exception as e:
+            print(f"Pre-roll error: {str(e)}")
+            self.cancel_preroll()
+
+    def create_deck(self):
+        media_player = self.instance.media_player_new()
+        widget = self.create_surface()
+        # Laid out next to the playing surface but hidden, it only takes space once swapped in
+        self.layout.insertWidget(self.layout.indexOf(self.video_widget) + 1, widget, 1)
+        widget.hide()
+        self.attach_surface(media_player, widget)
+        bridge = VlcEventBridge(media_player, parent=self)
+        bridge.state_changed.connect(self.on_preroll_state)
+        return {'player': media_player, 'widget': widget, 'bridge': bridge}
+
+    def on_preroll_state(self, state):
+        deck = self.preroll_deck
+        if not deck or self.sender() is not deck['bridge']:
+            return
+        if state == 'paused':
+            print(f"Up next ready: {deck['youtube_url']}")
+        elif state == 'error':
+            print("Pre-roll failed, the next video will be opened normally")
+            self.cancel_preroll()
+
+    def cancel_preroll(self):
+        deck, self.preroll_deck = self.preroll_deck, None
+        if not deck:
+            return
+        deck['player'].stop()
+        deck['bridge'].clear()
+        self.spare_deck = deck
+
+    def play_preroll(self):
+        """Swap the pre-rolled player in; False if there is nothing (healthy) to swap to"""
+        deck = self.preroll_deck
+        if not deck or deck['player'].get_state() not in (vlc.State.Opening, vlc.State.Buffering, vlc.State.Paused):
+            self.cancel_preroll()
+            return False
+        self.preroll_deck = None
+        fullscreen = self.is_fullscreen
+        if fullscreen:
+            self.toggle_fullscreen()  # the fullscreen window is the old surface
+        old = self.deck
+        self.record_throughput()
+        self.caching_controller.begin(self.origin_url(deck['urls'][0]), False)
+        self.connect_events(old['bridge'], False)
+        old['bridge'].clear()
+        self.connect_events(deck['bridge'])
+        self.deck = deck
+        self.media_player, self.video_widget, self.vlc_events = deck['player'], deck['widget'], deck['bridge']
+        self.current_video_url = deck['urls'][0]
+        self.youtube_url = deck['youtube_url']
+        self.is_live = False
+        self.audio_track_checked = False
+        self.end_handled = False
+        self.near_end_reported = False
+        self.seek_slider.setMaximum(0)
+        self.on_length_changed(self.media_player.get_length())  # reported while it was still hidden
+        if not self.audio_only:
+            self.video_widget.show()
+        old['widget'].hide()
+        self.media_player.audio_set_volume(self.volume_slider.value())
+        self.media_player.set_pause(0)
+        with tracer.span('up next: stop previous'):
+            old['player'].stop()
+        self.spare_deck = old
+        if fullscreen:
+            self.toggle_fullscreen()
+        if len(deck['urls']) > 1:
+            QTimer.singleShot(3000, self.check_audio_sync)
+        self.comment_model.set_status("Loading comments...")
+        self.advanced.emit(self.youtube_url)
+        return True
+
+    @staticmethod
+    def is_progressive(url):
+        # Manifests reference their segments relatively, those have to come from the origin
+        path = urlparse(url).path
+        return not (path.endswith(('.m3u8', '.mpd')) or '/manifest/' in path)
+
     def check_audio_sync(self):
         """Check and adjust audio sync if needed"""
         if self.media_player.is_playing():
             video_pos = self.media_player.get_time()
             if video_pos > 0:
                 # Reset audio timing if significantly out of sync
-                self.media_player.set_time(video_pos)
-                self.media_player.audio_set_delay(0)
+                with tracer.span('audio sync re-seek', position=video_pos):
+                    self.media_player.set_time(video_pos)
+                    self.media_player.audio_set_delay(0)
 
-    def stop(self):
-        # Use invokeMethod to stop timers on the correct thread
-        QMetaObject.invokeMethod(self.buffer_timer, "stop", Qt.QueuedConnection)
-        QMetaObject.invokeMethod(self.update_timer, "stop", Qt.QueuedConnection)
-        self.media_player.stop()
+    def media_stats(self):
+        media = self.media_player.get_media()
+        stats = vlc.MediaStats()
+        if not media or not media.get_stats(stats):
+            return None
+        return stats
 
-    def check_buffering(self):
-        if self.is_live or self.is_scrubbing:
-            self.last_position = self.media_player.get_time()
+    def sample_throughput(self):
+        """Peak read rate over the first seconds of a session, when VLC reads as fast as the link allows"""
+        if self.is_live or not self.throughput_started or time.time() - self.throughput_started > 15:
             return
-        if not self.media_player.is_playing():
+        stats = self.media_stats()
+        if not stats:
             return
-        # Removed custom buffering handling; use VLC's default behavior instead.
-        self.last_position = self.media_player.get_time()
+        now = time.time()
+        if self.throughput_last and now - self.throughput_last[0] < 0.25:
+            return  # events can come in bursts, short windows would overstate the rate
+        if self.throughput_last and stats.read_bytes > self.throughput_last[1]:
+            elapsed = now - self.throughput_last[0]
+            if elapsed > 0:
+                self.throughput_peak = max(self.throughput_peak, (stats.read_bytes - self.throughput_last[1]) / elapsed)
+        self.throughput_last = (now, stats.read_bytes)
+
+    def record_throughput(self):
+        if self.bandwidth_estimator and self.throughput_peak > 64 * 1024:
+            self.bandwidth_estimator.add_sample(self.throughput_peak, 'vlc')
+        self.throughput_started = 0
+        self.throughput_last = None
+        self.throughput_peak = 0
+
+    def stop(self):
+        self.cancel_preroll()
+        self.record_throughput()
+        self.caching_controller.end()
+        self.media_player.stop()
+        self.vlc_events.clear()
 
     def resume_from_buffer(self):
         # Auto-resume is disabled; do nothing.
@@ -770,43 +986,92 @@ class CustomVideoPlayer(QWidget):
         return self.back_to_youtube
 
     def download_video(self):
-        """Download the current video"""
+        """Queue the current video for download"""
         if not self.youtube_url:
             return
-
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.download_button.setEnabled(False)
-        self.download_button.setToolTip("Downloading...")
-
-        self.download_thread = Downloader(self.youtube_url, 'video')
-        self.download_thread.finished.connect(self.download_finished)
-        self.download_thread.error.connect(self.download_error)
-        self.download_thread.start()
+        self.download_manager.enqueue(self.youtube_url, 'video', self.download_session())
+        self.show_download_status('video')
 
     def download_mp3(self):
-        """Download the current video as MP3"""
+        """Queue the current video for download as MP3"""
         if not self.youtube_url:
             return
+        self.download_manager.enqueue(self.youtube_url, 'mp3', self.download_session())
+        self.show_download_status('mp3')
+
+    def show_download_menu(self, kind, pos):
+        menu = QMenu(self)
+        for job_id, url, state in self.download_manager.jobs(kind):
+            label = url.split('v=')[-1] if url else "file conversion"
+            menu.addAction(f"Cancel {label} ({state})", lambda j=job_id: self.download_manager.cancel(j))
+        if kind == 'mp3':
+            menu.addSeparator()
+            menu.addAction("Convert files to MP3...", self.convert_to_mp3)
+        button = self.download_button_for(kind)
+        menu.exec_(button.mapToGlobal(pos))
+
+    def convert_to_mp3(self):
+        """Queue media files from disk for MP3 extraction, behind any running download"""
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        paths, _ = QFileDialog.getOpenFileNames(self, "Convert to MP3", os.path.join(script_dir, 'downloads'),
+                                                "Media files (*.mp4 *.mkv *.webm *.m4a *.opus *.flv)")
+        mp3_dir = os.path.join(script_dir, 'mp3')
+        if not os.path.exists(mp3_dir):
+            os.makedirs(mp3_dir)
+        if self.download_manager.convert(paths, 'mp3', output_dir=mp3_dir):
+            self.show_download_status('mp3')
+
+    def download_session(self):
+        """The playing video's resolved info and formats, while its stream URLs are still good"""
+        session = self.playback_session() if self.playback_session else None
+        if not session or not session.get('video_format') or not session.get('audio_format'):
+            return None
+        if f"v={session['video_id']}" not in self.youtube_url:
+            return None
+        expiry = InfoCache.stream_expiry(session['info'])
+        if expiry and expiry < time.time() + 600:
+            return None  # a long download would outlive the URLs, resolve afresh
+        return session
+
+    def download_button_for(self, kind):
+        return self.mp3_button if kind == 'mp3' else self.download_button
 
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.mp3_button.setEnabled(False)
-        self.mp3_button.setToolTip("Downloading MP3...")
+    def show_download_status(self, kind, status=None):
+        queued = self.download_manager.active(kind)
+        text = status or "Queued"
+        if queued > 1:
+            text += f" (+{queued - 1} more)"
+        self.download_button_for(kind).setToolTip(text)
 
-        self.mp3_thread = Downloader(self.youtube_url, 'mp3')
-        self.mp3_thread.finished.connect(self.mp3_download_finished)
-        self.mp3_thread.error.connect(self.download_error)
-        self.mp3_thread.start()
+    def on_download_progress(self, job_id, kind, fraction, speed, eta):
+        # Already throttled by the downloader, a tooltip update per tick is cheap
+        status = f"Downloading {fraction:.0%}"
+        if speed > 0:
+            status += f" - {speed / 1e6:.1f} MB/s"
+        if eta >= 0:
+            status += f" - {self.format_time(eta * 1000)} left"
+        self.show_download_status(kind, status)
+
+    def on_download_processing(self, job_id, kind, fraction):
+        self.show_download_status(kind, f"{'Converting to MP3' if kind == 'mp3' else 'Remuxing'} {fraction:.0%}")
+
+    def on_download_finished(self, job_id, kind):
+        if self.download_manager.active(kind):
+            self.show_download_status(kind, "Downloaded one")
+        elif kind == 'mp3':
+            self.mp3_download_finished()
+        else:
+            self.download_finished()
 
     def download_finished(self):
         """Handle video download completion"""
-        QApplication.restoreOverrideCursor()
-        self.download_button.setEnabled(True)
         self.download_button.setToolTip("Download Complete!")
         
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Go up one level to TYP folder
         downloads_dir = os.path.join(script_dir, 'downloads')
         if not os.path.exists(downloads_dir):
             os.makedirs(downloads_dir)
+        from core.file_explorer import FileExplorerDialog  # pulls in QtMultimedia, only when needed
         dialog = FileExplorerDialog(downloads_dir, "Downloaded Videos", self)
         dialog.exec_()
         
@@ -814,36 +1079,32 @@ class CustomVideoPlayer(QWidget):
 
     def mp3_download_finished(self):
         """Handle MP3 download completion"""
-        QApplication.restoreOverrideCursor()
-        self.mp3_button.setEnabled(True)
         self.mp3_button.setToolTip("MP3 Download Complete!")
         
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Go up one level to TYP folder
         mp3_dir = os.path.join(script_dir, 'mp3')
         if not os.path.exists(mp3_dir):
             os.makedirs(mp3_dir)
+        from core.file_explorer import FileExplorerDialog
         dialog = FileExplorerDialog(mp3_dir, "Downloaded Audio", self)
         dialog.exec_()
         
         QTimer.singleShot(3000, lambda: self.mp3_button.setToolTip("Download MP3"))
 
-    def download_error(self, error_message):
+    def download_error(self, job_id, kind, error_message):
         """Handle download errors"""
-        QApplication.restoreOverrideCursor()
-        self.download_button.setEnabled(True)
-        self.mp3_button.setEnabled(True)
         print(f"Download error: {error_message}")
+        self.show_download_status(kind, "Cancelled" if error_message == "Cancelled" else "Download failed")
 
-    def on_playback_finished(self, event):
-        # VLC's MediaPlayerEndReached event triggers this method.
+    def on_playback_finished(self):
+        # End of media, delivered on the GUI thread by the event bridge
+        if self.end_handled or not self.isVisible():
+            return  # already handled, the near-end check and EndReached both land here
+        self.end_handled = True
+        if self.play_preroll():
+            return  # the next video is already playing
         self.stop()
-        self.update_timer.stop()
-        self.playbackFinished.emit()  # Notifies the parent to revert to YouTube view
-        time.sleep(1)
-        back_button = self.get_back_button()
-        if back_button:
-            back_button.click()
-        self.hide()
+        self.playbackFinished.emit()  # the parent plays what is queued next or reverts to YouTube view
 
     def toggle_theater_mode(self):
         """Toggle theater mode by showing/hiding elements and adjusting layout"""
@@ -869,4 +1130,5 @@ class CustomVideoPlayer(QWidget):
         
         # Force layout update
         self.bottom_container.updateGeometry()
-        self.layout.update()
\ No newline at end of file
+        self.layout.update()
+        self.report_surface()
\ No newline at end of file
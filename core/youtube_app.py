@@ -2,19 +2,26 @@ import sys
 import re
 import logging
 import os
-import time
+from urllib.parse import urlparse, parse_qs
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QMenu, QToolButton
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile, QWebEnginePage, QWebEngineSettings
 from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor
-from PyQt5.QtCore import QUrl, QEventLoop, QTimer, QStandardPaths, QThread, pyqtSignal, QThreadPool, Qt, QSize
-from PyQt5.QtMultimedia import QMediaPlayer
+from PyQt5.QtCore import QUrl, QEvent, QEventLoop, QTimer, QStandardPaths, QThread, pyqtSignal, QThreadPool, Qt, QSize
 from PyQt5.QtGui import QFont, QIcon, QPixmap
-import yt_dlp
-from core.video_player import CustomVideoPlayer
-from core.file_explorer import FileExplorerDialog
 from utils.URLIntercept import URLInterceptor 
 from utils.CustomPermissions import CustomWebPage
 from utils.CommentFetcher import CommentFetcher
+from utils.StreamResolver import StreamResolver
+from utils.InfoCache import InfoCache
+from utils.LinkBridge import LinkBridge
+from utils.BandwidthEstimator import BandwidthEstimator
+from utils.FormatSelector import FormatSelector
+from utils.DecodeBenchmark import DecodeBenchmark
+from utils.DashManifest import DashManifest
+from utils.CachingController import CachingController
+from utils.PlaybackQueue import PlaybackQueue
+from utils.StartupProfiler import profiler
+from utils.PlaybackTracer import tracer
 # =============================================
 #   _______  __     __  _____  
 #  |__   __| \ \   / / |  __ \ 
@@ -54,7 +61,8 @@ class YouTubeApp(QMainWindow):
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
 
-        profile = QWebEngineProfile.defaultProfile()
+        with profiler.phase("web profile"):
+            profile = QWebEngineProfile.defaultProfile()
         
         # Set up storage paths
         data_path = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
@@ -72,9 +80,10 @@ class YouTubeApp(QMainWindow):
         profile.setUrlRequestInterceptor(self.interceptor)
         
         # Create web view widget with custom settings - sets the background page to the video so we make sure to get data to yt algo
-        self.browser = QWebEngineView()
-        self.custom_page = CustomWebPage(profile, self.browser)
-        self.browser.setPage(self.custom_page)
+        with profiler.phase("browser view"):
+            self.browser = QWebEngineView()
+            self.custom_page = CustomWebPage(profile, self.browser)
+            self.browser.setPage(self.custom_page)
         
         # Updated dark mode injection that won't block loading
         dark_mode_js = """
@@ -206,13 +215,62 @@ class YouTubeApp(QMainWindow):
         self.browser.resizeEvent = lambda e: update_button_position()
         update_button_position()
 
-        # Create video player
-        self.video_player = CustomVideoPlayer()
-        self.video_player.get_back_button().clicked.connect(self.return_to_youtube)
-        self.layout.addWidget(self.video_player)
-        self.video_player.hide()
+        # Throughput history from earlier sessions drives the initial format choice
+        self.bandwidth_estimator = BandwidthEstimator(data_path + "/bandwidth.json")
+        self.decode_benchmark = DecodeBenchmark(data_path + "/decode_benchmark.json", data_path + "/decode_samples")
+        self.format_selector = FormatSelector(self.bandwidth_estimator, self.decode_benchmark)
+
+        # VLC's caching window per host, tuned from stalls and read stats of earlier sessions
+        self.caching_controller = CachingController(data_path + "/network_caching.json")
+
+        # VLC streams VODs through a local range proxy backed by a disk chunk cache; it pulls in
+        # requests and scans the cache, so it is started with the player after the first paint
+        self.stream_cache_path = data_path + "/stream_cache"
+        self.stream_proxy = None
+
+        # The video player (and with it libVLC) is built after the first paint, see warm_up
+        self.video_player = None
+        self.now_playing = None  # video id, info, chosen formats and mode of the current VOD
+        self.prefer_audio_only = False  # picked with the player's button, sticks for later videos
+        self.auto_audio_only = False  # switched by minimizing, undone on restore
+        # A quick minimize/restore shouldn't reopen the streams twice
+        self.background_timer = QTimer(self)
+        self.background_timer.setSingleShot(True)
+        self.background_timer.setInterval(1500)
+        self.background_timer.timeout.connect(self.enter_background)
+        # Playlist and user-queued videos; the next one is resolved and pre-rolled while this one plays
+        self.play_queue = PlaybackQueue(self)
+        self.play_queue.changed.connect(self.prepare_next)
+        self.up_next = None  # same shape as now_playing, for the pre-rolled video
+
+        # Stream info is resolved on a background worker so the window never freezes
+        ydl_opts = {
+            'format': 'bestvideo[height<=?1080][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',  # Prefer MP4 video and M4A audio
+            'merge_output_format': 'mp4',
+            'quiet': False,
+            'no_warnings': False,
+            # Comments are pulled later from the deferred source, capped, top-sorted and without replies
+            'extractor_args': {'youtube': {
+                'max_comments': [str(CommentFetcher.MAX_COMMENTS), 'all', '0'],
+                'comment_sort': ['top'],
+            }},
+        }
+        with profiler.phase("resolver"):
+            self.info_cache = InfoCache(disk_dir=data_path + "/info_cache")
+            self.resolver = StreamResolver(ydl_opts, self.info_cache, self)
+        self.resolver.resolved.connect(self.on_video_resolved)
+        self.resolver.failed.connect(self.on_resolve_failed)
+        self.resolver.prefetcher.prefetched.connect(self.on_next_prefetched)
+
+        # Let the page report hovered/on-screen watch links so they resolve before the click
+        self.link_bridge = LinkBridge(self)
+        self.link_bridge.install(self.custom_page)
+        self.link_bridge.hovered.connect(lambda video_id: self.resolver.prefetcher.hint(video_id, urgent=True))
+        self.link_bridge.visible.connect(self.resolver.prefetcher.hint_many)
+        self.link_bridge.queued.connect(self.play_queue.add)
 
         self.comment_cache = {}
+        self.retired_fetchers = []
         self.thread_pool = QThreadPool()
         self.thread_pool.setMaxThreadCount(4)  # Limit thread count
 
@@ -243,11 +301,65 @@ class YouTubeApp(QMainWindow):
         # Force refresh the page
         self.browser.setUrl(QUrl("https://www.youtube.com"))
 
+    def warm_up(self):
+        """Build the heavy pieces once the window is on screen instead of before it"""
+        profiler.mark("first paint")
+        self.ensure_video_player()
+        profiler.report()
+        if self.decode_benchmark.needed():
+            # Once per machine, late enough not to compete with startup
+            QTimer.singleShot(10000, self.decode_benchmark.start)
+
+    def ensure_stream_proxy(self):
+        if self.stream_proxy is None:
+            with profiler.phase("stream proxy"):
+                from utils.RangeProxy import RangeProxy
+                self.stream_proxy = RangeProxy(self.stream_cache_path, bandwidth_estimator=self.bandwidth_estimator).start()
+        return self.stream_proxy
+
+    def ensure_video_player(self):
+        if self.video_player is None:
+            self.ensure_stream_proxy()
+            with profiler.phase("video player (libVLC)"):
+                from core.video_player import CustomVideoPlayer
+                self.video_player = CustomVideoPlayer(bandwidth_estimator=self.bandwidth_estimator,
+                                                      stream_proxy=self.stream_proxy,
+                                                      caching_controller=self.caching_controller)
+                self.video_player.get_back_button().clicked.connect(self.return_to_youtube)
+                self.layout.addWidget(self.video_player)
+                self.video_player.surface_changed.connect(self.on_surface_changed)
+                self.video_player.audio_only_requested.connect(self.on_audio_only_requested)
+                self.video_player.nearing_end.connect(self.preroll_next)
+                self.video_player.advanced.connect(self.on_advanced)
+                self.video_player.playbackFinished.connect(self.on_playback_finished)
+                self.video_player.playback_session = lambda: self.now_playing
+                self.video_player.hide()
+        return self.video_player
+
+    def closeEvent(self, event):
+        self.resolver.shutdown()
+        if self.decode_benchmark.isRunning():
+            self.decode_benchmark.requestInterruption()
+            self.decode_benchmark.wait(2000)
+        if self.video_player:
+            self.video_player.download_manager.shutdown()
+        if self.stream_proxy:
+            self.stream_proxy.stop()
+        tracer.export()
+        super().closeEvent(event)
+
     def return_to_youtube(self):
+        self.now_playing = None
+        self.up_next = None
+        self.play_queue.clear()  # the playlist ends here, videos queued by hand stay
+        self.auto_audio_only = False
+        self.background_timer.stop()
+        self.resolver.cancel()  # a result still in flight must not reopen the player
+        self.resolver.prefetcher.resume()
         self.browser.setUrl(QUrl("https://www.youtube.com")) # always goes back home
-        self.video_player.hide()
-        self.video_player.stop()
-        time.sleep(1)
+        if self.video_player:
+            self.video_player.hide()
+            self.video_player.stop()  # returns once VLC has stopped, nothing to wait for on the GUI thread
         self.browser.page().setAudioMuted(False) # not really needed but just in case
         self.browser.show()
 
@@ -262,6 +374,7 @@ class YouTubeApp(QMainWindow):
         if "m3u8" in url.toString():
             # Example usage: pass the M3U8 link to the video player
             m3u8_link = url.toString()
+            self.ensure_video_player()
             self.video_player.play_video([m3u8_link], m3u8_link, is_live=True)
             self.video_player.show()
             self.browser.hide()
@@ -271,6 +384,9 @@ class YouTubeApp(QMainWindow):
             self.browser.page().setAudioMuted(True)
             self.browser.setUrl(QUrl("https://www.youtube.com")) # always goes back home
             # Then start the video download process
+            tracer.begin_session(video_id)
+            playlist_id = parse_qs(urlparse(url.toString()).query).get('list', [None])[0]
+            self.play_queue.start(video_id, playlist_id)
             self.download_and_play_video(video_id)
 
     def pause_browser_video(self):
@@ -280,103 +396,290 @@ class YouTubeApp(QMainWindow):
         )
     
     def download_and_play_video(self, video_id):
+        # Prevent background playback:
+        self.pause_browser_video()
+        self.browser.hide()
+        self.ensure_video_player()
+        # Show the player straight away, the info arrives through on_video_resolved
+        self.video_player.stop()
+        self.video_player.set_video_info(title="Loading...", description="")
+        self.video_player.show()
+        self.layout.activate()  # a cached result resolves synchronously, the surface has to be sized by then
+        self.resolver.prefetcher.pause()  # nothing speculative while this one starts and plays
+        self.resolver.resolve(video_id)
+
+    def on_video_resolved(self, video_id, info):
         try:
-            # Prevent background playback:
-            self.pause_browser_video()
-            self.browser.hide()
-            script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            ffmpeg_exe = os.path.join(script_dir, 'ffmpeg', 'bin', 'ffmpeg.exe')
-            
             base_url = f'https://www.youtube.com/watch?v={video_id}'
-            ydl_opts = {
-                'format': 'bestvideo[height<=?1080][ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',  # Prefer MP4 video and M4A audio
-                'merge_output_format': 'mp4',
-                'quiet': False,
-                'no_warnings': False,
-                'logger': logging.getLogger(),
-            }
+            self.now_playing = None
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                print(f"Fetching video info for: {base_url}")
-                info = ydl.extract_info(base_url, download=False)
+            # Check if this is a live stream
+            is_live = info.get('is_live', False)
+            print(f"Is live stream: {is_live}")
+
+            # For live streams, prefer a single combined stream
+            if is_live:
+                formats = info.get('formats', [])
+                formats = [f for f in formats if f.get('acodec', 'none') != 'none' 
+                         and f.get('vcodec', 'none') != 'none']
                 
-                if not info:
-                    print("Failed to get video info")
+                if formats:
+                    formats.sort(key=lambda x: (x.get('height', 0), x.get('tbr', 0)), reverse=True)
+                    best_format = formats[0]
+                    video_url = best_format['url']
+                    print(f"Using combined format for live: {best_format.get('format_note', '')}")
+                    self.browser.hide()
+                    self.video_player.set_audio_only(False)
+                    self.video_player.show()
+                    self.video_player.set_video_info(
+                        title=f"🔴 LIVE: {info.get('title', '')}",
+                        description=info.get('description', '')
+                    )
+                    self.video_player.play_video([video_url], base_url)
                     return
 
-                # Check if this is a live stream
-                is_live = info.get('is_live', False)
-                print(f"Is live stream: {is_live}")
-
-                # For live streams, prefer a single combined stream
-                if is_live:
-                    formats = info.get('formats', [])
-                    formats = [f for f in formats if f.get('acodec', 'none') != 'none' 
-                             and f.get('vcodec', 'none') != 'none']
-                    
-                    if formats:
-                        formats.sort(key=lambda x: (x.get('height', 0), x.get('tbr', 0)), reverse=True)
-                        best_format = formats[0]
-                        video_url = best_format['url']
-                        print(f"Using combined format for live: {best_format.get('format_note', '')}")
-                        self.browser.hide()
-                        self.video_player.show()
-                        self.video_player.set_video_info(
-                            title=f"🔴 LIVE: {info.get('title', '')}",
-                            description=info.get('description', '')
-                        )
-                        self.video_player.play_video([video_url], base_url)
-                        return
-
-                # For VODs, use separate streams
-                if 'requested_formats' in info:
-                    formats = info['requested_formats']
-                    video_format = None
-                    audio_format = None
-                    
-                    for fmt in formats:
-                        if fmt.get('vcodec', 'none') != 'none' and not video_format:
-                            video_format = fmt
-                            print(f"Video stream: {fmt.get('format_note', '')}, "
-                                  f"Resolution: {fmt.get('height', '')}p, "
-                                  f"Codec: {fmt.get('vcodec', '')}")
-                        elif fmt.get('acodec', 'none') != 'none' and not audio_format:
-                            audio_format = fmt
-                            print(f"Audio stream: {fmt.get('format_note', '')}, "
-                                  f"Codec: {fmt.get('acodec', '')}")
-
-                    if video_format and audio_format:
-                        self.browser.hide()
-                        self.video_player.show()
-                        self.video_player.set_video_info(
-                            title=info.get('title', ''),
-                            description=info.get('description', '')
-                        )
-                        self.video_player.play_video(
-                            [video_format['url'], audio_format['url']], 
-                            base_url
-                        )
-                    else:
-                        # Fallback to best combined format
-                        video_url = info['url']
-                        print(f"Using combined format: {info.get('format_note', '')}")
-                        self.browser.hide()
-                        self.video_player.show()
-                        self.video_player.set_video_info(
-                            title=info.get('title', ''),
-                            description=info.get('description', '')
-                        )
-                        self.video_player.play_video([video_url], base_url)
-
-                # Fetch comments for VODs only
-                if not is_live:
-                    self.comment_fetcher = CommentFetcher(video_id)
-                    self.comment_fetcher.comments_ready.connect(self.video_player.update_comments)
-                    self.comment_fetcher.start(QThread.HighPriority)
+            # VODs: FormatSelector picks the video/audio pair for the link, the decoder and the
+            # surface size; pick_formats falls back to yt-dlp's own pick from the format string
+            with tracer.span('format selection', video_id):
+                video_format, audio_format = self.pick_formats(info, self.video_player.surface_size())
+
+            if video_format and audio_format:
+                print(f"Video stream: {video_format.get('format_note', '')}, "
+                      f"Resolution: {video_format.get('height', '')}p, "
+                      f"Codec: {video_format.get('vcodec', '')}")
+                print(f"Audio stream: {audio_format.get('format_note', '')}, "
+                      f"Codec: {audio_format.get('acodec', '')}")
+                self.browser.hide()
+                self.video_player.show()
+                self.video_player.set_video_info(
+                    title=info.get('title', ''),
+                    description=info.get('description', '')
+                )
+                self.now_playing = {'video_id': video_id, 'info': info, 'video_format': video_format,
+                                    'audio_format': audio_format, 'height': video_format.get('height') or 0,
+                                    'audio_only': self.prefer_audio_only}
+                self.video_player.set_audio_only(self.prefer_audio_only, info.get('thumbnail'))
+                self.video_player.play_video(self.stream_urls(self.now_playing), base_url)
+                self.up_next = None  # stopping the last video dropped its pre-roll
+                self.prepare_next()
+            else:
+                # Fallback to best combined format
+                video_url = info['url']
+                print(f"Using combined format: {info.get('format_note', '')}")
+                self.browser.hide()
+                self.video_player.set_audio_only(False)
+                self.video_player.show()
+                self.video_player.set_video_info(
+                    title=info.get('title', ''),
+                    description=info.get('description', '')
+                )
+                self.video_player.play_video([video_url], base_url)
+
+            # Fetch comments for VODs only
+            if not is_live:
+                self.fetch_comments(video_id, info)
 
         except Exception as e:
             print(f"Error playing video: {str(e)}")
-            self.browser.show()
+            self.return_to_youtube()
+
+    def on_surface_changed(self, width, height):
+        """Fullscreen/theater made the video bigger: move to a taller representation at the same position"""
+        playing = self.now_playing
+        if not playing or playing['audio_only'] or self.video_player.is_live:
+            return
+        video_format, audio_format = self.format_selector.select(playing['info'], (width, height))
+        if not (video_format and audio_format) or video_format['height'] <= playing['height']:
+            return  # shrinking the surface keeps the sharper stream that is already buffered
+        print(f"Surface now {width}x{height}, upgrading to {video_format['height']}p")
+        playing.update(video_format=video_format, audio_format=audio_format, height=video_format['height'])
+        self.video_player.switch_streams(self.stream_urls(playing, (width, height)))
+
+    def fetch_comments(self, video_id, info):
+        self.stop_comment_fetcher()
+        self.comment_fetcher = CommentFetcher(video_id, info.get('__comment_continuation'))
+        self.comment_fetcher.comments_ready.connect(self.video_player.update_comments)
+        self.comment_fetcher.start(QThread.HighPriority)
+
+    def pick_formats(self, info, surface=None):
+        """(video_format, audio_format) ranked against the link, else yt-dlp's own pick; (None, None) if neither"""
+        video_format, audio_format = self.format_selector.select(info, surface)
+        if not (video_format and audio_format):
+            video_format = None
+            audio_format = None
+            for fmt in info.get('requested_formats') or []:
+                if fmt.get('vcodec', 'none') != 'none' and not video_format:
+                    video_format = fmt
+                elif fmt.get('acodec', 'none') != 'none' and not audio_format:
+                    audio_format = fmt
+        return video_format, audio_format
+
+    def stream_urls(self, playing, surface=None):
+        """What the player opens for a VOD: just the audio track, a manifest or the plain pair"""
+        video_format, audio_format = playing['video_format'], playing['audio_format']
+        if playing['audio_only']:
+            # No video is fetched or decoded at all, a fraction of the bandwidth and CPU
+            return [audio_format['url']]
+        manifest_url = self.publish_manifest(playing['video_id'], playing['info'], video_format, audio_format, surface)
+        if manifest_url:
+            # One adaptive timeline: VLC switches bitrate itself and A/V can't drift apart
+            return [manifest_url]
+        return [video_format['url'], audio_format['url']]
+
+    def set_audio_only(self, enabled):
+        """Switch the playing VOD between audio-only and video at the same position"""
+        playing = self.now_playing
+        if not playing or self.video_player.is_live:
+            return False
+        if playing['audio_only'] == enabled:
+            return True
+        playing['audio_only'] = enabled
+        self.video_player.set_audio_only(enabled, playing['info'].get('thumbnail'))
+        if not enabled:
+            # The surface may have changed while the thumbnail was up
+            video_format, audio_format = self.format_selector.select(playing['info'], self.video_player.surface_size())
+            if video_format and audio_format:
+                playing.update(video_format=video_format, audio_format=audio_format, height=video_format['height'])
+        print(f"Switching to {'audio only' if enabled else 'video'}")
+        self.video_player.switch_streams(self.stream_urls(playing))
+        if self.up_next:
+            # The pre-rolled video was opened for the other mode
+            self.up_next = None
+            self.video_player.cancel_preroll()
+            if self.video_player.near_end_reported:
+                self.preroll_next()
+        return True
+
+    def prepare_next(self):
+        """Get the next queued video's info into the cache while the current one plays"""
+        if not self.now_playing or not self.video_player:
+            return
+        next_id = self.play_queue.peek()
+        if self.up_next and self.up_next['video_id'] != next_id:
+            self.up_next = None  # the queue changed under the pre-rolled video
+            self.video_player.cancel_preroll()
+        if not next_id or self.up_next:
+            return
+        if self.video_player.near_end_reported:
+            self.preroll_next()
+        elif not self.info_cache.get(next_id, memory_only=True):
+            self.resolver.prefetcher.preload(next_id)
+
+    def preroll_next(self):
+        """Close to the end: open the next queued video paused on the player's second deck"""
+        next_id = self.play_queue.peek()
+        if not next_id or not self.now_playing or self.up_next:
+            return
+        info = self.info_cache.get(next_id, memory_only=True)
+        if not info:
+            # The worker reads the disk tier or resolves it, pre-rolled from on_next_prefetched
+            self.resolver.prefetcher.preload(next_id)
+            return
+        if not InfoCache.is_cacheable(info):
+            return  # live, the normal path handles it once this one ends
+        video_format, audio_format = self.pick_formats(info, self.video_player.surface_size())
+        if not (video_format and audio_format):
+            return
+        self.up_next = {'video_id': next_id, 'info': info, 'video_format': video_format,
+                        'audio_format': audio_format, 'height': video_format.get('height') or 0,
+                        'audio_only': self.now_playing['audio_only']}
+        print(f"Pre-rolling up next: {next_id}")
+        self.video_player.preroll(self.stream_urls(self.up_next), f'https://www.youtube.com/watch?v={next_id}')
+
+    def on_next_prefetched(self, video_id, info):
+        if info and video_id == self.play_queue.peek() and self.video_player and self.video_player.near_end_reported:
+            self.preroll_next()
+
+    def on_advanced(self, youtube_url):
+        """The player swapped to the pre-rolled video without a gap"""
+        playing, self.up_next = self.up_next, None
+        if not playing:
+            return
+        self.now_playing = playing
+        info = playing['info']
+        tracer.begin_session(playing['video_id'])
+        self.video_player.set_video_info(title=info.get('title', ''), description=info.get('description', ''))
+        self.video_player.set_audio_only(playing['audio_only'], info.get('thumbnail'))
+        self.fetch_comments(playing['video_id'], info)
+        self.play_queue.advance()  # emits changed, which lines up the one after
+
+    def on_playback_finished(self):
+        # Nothing was pre-rolled (or it failed): play the next one the normal way, else go home
+        next_id = self.play_queue.advance()
+        if next_id:
+            tracer.begin_session(next_id)
+            self.download_and_play_video(next_id)
+        else:
+            self.return_to_youtube()
+
+    def on_audio_only_requested(self, enabled):
+        self.auto_audio_only = False
+        if self.set_audio_only(enabled):
+            self.prefer_audio_only = enabled
+        else:
+            self.video_player.audio_only_button.setChecked(self.video_player.audio_only)  # live or combined stream
+
+    def enter_background(self):
+        playing = self.now_playing
+        # A paused video decodes nothing, reopening it would only start playback
+        if not playing or playing['audio_only'] or not self.video_player.media_player.is_playing():
+            return
+        self.auto_audio_only = self.set_audio_only(True)
+
+    def set_background(self, background):
+        if background:
+            if self.now_playing and not self.now_playing['audio_only']:
+                self.background_timer.start()
+            return
+        self.background_timer.stop()
+        if self.auto_audio_only:
+            self.auto_audio_only = False
+            self.set_audio_only(False)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            self.set_background(self.isMinimized())
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        # Only hides by the window system; closing the window hides it too
+        if event.spontaneous():
+            self.set_background(True)
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        if event.spontaneous():
+            self.set_background(False)
+        super().showEvent(event)
+
+    def publish_manifest(self, video_id, info, video_format, audio_format, surface=None):
+        """Local URL of a DASH manifest covering the format ladder, or None to play the pair directly"""
+        surface = surface or self.video_player.surface_size()
+        ladder = self.format_selector.ladder(info, video_format, audio_format, surface)
+        if not ladder or not info.get('duration') or not self.stream_proxy:
+            return None
+        videos, audio = ladder
+        with tracer.span('build manifest', video_id, representations=len(videos)):
+            # Segments go through the proxy too, so every representation shares the chunk cache
+            mpd = DashManifest(info['duration'], videos, audio).render(
+                lambda url: self.stream_proxy.url_for(url, video_id))
+        print(f"Adaptive manifest with {len(videos)} video representations, "
+              f"up to {max(f['height'] for f in videos)}p")
+        return self.stream_proxy.publish(f"{video_id}.mpd", mpd, 'application/dash+xml', origin=video_format['url'])
+
+    def stop_comment_fetcher(self):
+        """Stop the previous video's comments from streaming into the new one"""
+        fetcher = getattr(self, 'comment_fetcher', None)
+        if fetcher and fetcher.isRunning():
+            fetcher.comments_ready.disconnect()
+            fetcher.requestInterruption()
+            # Hold a reference until the thread really exits, a collected QThread takes the app down
+            self.retired_fetchers.append(fetcher)
+            fetcher.finished.connect(lambda f=fetcher: self.retired_fetchers.remove(f))
+
+    def on_resolve_failed(self, video_id, error):
+        print(f"Error playing video: {error}")
+        self.return_to_youtube()
 
     def open_downloads_folder(self):
         """Open the downloads folder in custom file explorer"""
@@ -384,6 +687,7 @@ class YouTubeApp(QMainWindow):
         downloads_dir = os.path.join(script_dir, 'downloads')
         if not os.path.exists(downloads_dir):
             os.makedirs(downloads_dir)
+        from core.file_explorer import FileExplorerDialog  # pulls in QtMultimedia, only when needed
         dialog = FileExplorerDialog(downloads_dir, "Downloaded Videos", self)
         dialog.exec_()
 
@@ -393,13 +697,15 @@ class YouTubeApp(QMainWindow):
         mp3_dir = os.path.join(script_dir, 'mp3')
         if not os.path.exists(mp3_dir):
             os.makedirs(mp3_dir)
+        from core.file_explorer import FileExplorerDialog
         dialog = FileExplorerDialog(mp3_dir, "Downloaded Audio", self)
         dialog.exec_()
 
 def main():
     # Add logging configuration
     logging.basicConfig(level=logging.INFO)
-    app = QApplication(sys.argv)
+    with profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
     
     # Set application-wide icon for taskbar with correct path
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -407,6 +713,9 @@ def main():
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
     
-    window = YouTubeApp()
+    with profiler.phase("main window"):
+        window = YouTubeApp()
     window.show()
+    # Runs on the first event loop turn, after the window has been painted
+    QTimer.singleShot(0, window.warm_up)
     sys.exit(app.exec_())
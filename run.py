@@ -1,5 +1,18 @@
-
 import sys
+
+if "--profile-startup" in sys.argv:
+    # Has to be switched on before anything heavy is imported
+    sys.argv.remove("--profile-startup")
+    from utils.StartupProfiler import profiler
+    profiler.enable()
+
+for arg in list(sys.argv):
+    # --trace-playback or --trace-playback=out.json, written when the window closes
+    if arg.split("=")[0] == "--trace-playback":
+        sys.argv.remove(arg)
+        from utils.PlaybackTracer import tracer
+        tracer.enable(arg.split("=", 1)[1] if "=" in arg else "playback_trace.json")
+
 from core.youtube_app import main
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+import threading
+import json
+import time
+import os
+
+class BandwidthEstimator:
+    """Remembers the download throughput of recent playback sessions and downloads across launches"""
+
+    def __init__(self, path=None, max_samples=20, max_age=7 * 86400):
+        self.path = path
+        self.max_samples = max_samples
+        self.max_age = max_age  # a week old sample says little about today's link
+        self.samples = []  # [timestamp, bytes_per_sec, source]
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.samples = json.load(f)[-self.max_samples:]
+        except Exception as e:
+            print(f"Bandwidth history read error: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            samples = list(self.samples)
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(samples, f)
+        except Exception as e:
+            print(f"Bandwidth history write error: {e}")
+
+    def add_sample(self, bytes_per_sec, source):
+        """Record a measured throughput; callable from any thread"""
+        if bytes_per_sec <= 0:
+            return
+        with self.lock:
+            self.samples.append([time.time(), bytes_per_sec, source])
+            del self.samples[:-self.max_samples]
+        print(f"Throughput sample from {source}: {bytes_per_sec * 8 / 1e6:.1f} Mbit/s")
+        self.save()
+
+    def estimate(self):
+        """Sustainable throughput in bytes/sec, or None without recent history"""
+        cutoff = time.time() - self.max_age
+        with self.lock:
+            rates = [rate for stamp, rate, _ in self.samples[-10:] if stamp >= cutoff]
+        if not rates:
+            return None
+        # Harmonic mean - one lucky burst can't talk us into a bitrate the link can't hold
+        return len(rates) / sum(1.0 / rate for rate in rates)
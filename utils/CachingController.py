@@ -0,0 +1,143 @@
+from urllib.parse import urlparse
+import statistics
+import json
+import time
+import os
+
+class CachingController:
+    """Picks VLC's network/live caching window per host from how earlier sessions on that host went
+
+    Stalls grow the window, a link that kept well ahead of playback with steady reads shrinks it,
+    so fast connections start sooner and flaky ones stop rebuffering.
+    """
+    DEFAULTS = {'vod': 1000, 'live': 5000}  # ms, what the player always used before
+    LIMITS = {'vod': (300, 8000), 'live': (1500, 20000)}
+    MIN_SESSION = 10  # seconds of playback before a session says anything
+    LOST_PER_SECOND = 1.0  # lost frames/buffers per second of playback that point at starvation (~2% at 60 fps)
+
+    def __init__(self, path=None, max_hosts=50):
+        self.path = path
+        self.max_hosts = max_hosts
+        self.hosts = {}  # host -> {'vod': ms, 'live': ms, 'updated': timestamp}
+        self.session = None
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.hosts = json.load(f)
+        except Exception as e:
+            print(f"Caching history read error: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.hosts, f)
+        except Exception as e:
+            print(f"Caching history write error: {e}")
+
+    @staticmethod
+    def host_key(url):
+        # rr3---sn-xyz.googlevideo.com changes per video, the network path behind it mostly doesn't
+        host = urlparse(url).hostname or ''
+        if host in ('localhost', '') or host.replace('.', '').isdigit():
+            return host or 'local'
+        return '.'.join(host.split('.')[-2:])
+
+    def caching_for(self, url, is_live):
+        kind = 'live' if is_live else 'vod'
+        return self.hosts.get(self.host_key(url), {}).get(kind, self.DEFAULTS[kind])
+
+    def begin(self, url, is_live):
+        """New media: close the previous session and return the caching window (ms) to open this one with"""
+        self.end()
+        caching = self.caching_for(url, is_live)
+        self.session = {
+            'host': self.host_key(url), 'kind': 'live' if is_live else 'vod', 'caching': caching,
+            'started': time.time(), 'playing_since': None, 'played': 0.0,
+            'stalls': [], 'rates': [], 'consumed': [], 'lost': 0, 'last': None,
+        }
+        return caching
+
+    def playing(self, playing):
+        session = self.session
+        if not session:
+            return
+        now = time.time()
+        if playing and session['playing_since'] is None:
+            session['playing_since'] = now
+        elif not playing and session['playing_since'] is not None:
+            session['played'] += now - session['playing_since']
+            session['playing_since'] = None
+
+    def stalled(self, duration_ms):
+        if self.session and self.session['playing_since'] is not None:
+            self.session['stalls'].append(duration_ms)
+
+    def sample(self, stats):
+        """Feed a vlc.MediaStats snapshot; called on position updates, uses at most one a second"""
+        session = self.session
+        if not session or stats is None:
+            return
+        now = time.time()
+        last = session['last']
+        if last and now - last[0] < 1:
+            return
+        lost = stats.lost_abuffers + stats.lost_pictures
+        session['last'] = (now, stats.read_bytes, stats.demux_read_bytes, lost)
+        if not last or session['playing_since'] is None:
+            return
+        elapsed = now - last[0]
+        read_rate = (stats.read_bytes - last[1]) / elapsed
+        consumed = (stats.demux_read_bytes - last[2]) / elapsed
+        session['lost'] += max(0, lost - last[3])
+        if consumed > 0:
+            session['rates'].append(read_rate)
+            session['consumed'].append(consumed)
+
+    def end(self):
+        session, self.session = self.session, None
+        if not session:
+            return
+        played = session['played']
+        if session['playing_since'] is not None:
+            played += time.time() - session['playing_since']
+        if played < self.MIN_SESSION:
+            return
+        caching = session['caching']
+        rates, consumed = session['rates'], session['consumed']
+        if not rates:
+            return
+        # With a full buffer VLC only reads as fast as it plays, so capacity shows in the bursts
+        # (seeks, the first fill) and jitter in the seconds where input fell well behind playback
+        playback_rate = statistics.median(consumed)
+        capacity = sorted(rates)[int(len(rates) * 0.9)] / playback_rate
+        starved = sum(r < c * 0.5 for r, c in zip(rates, consumed)) / len(rates)
+        summary = f"capacity {capacity:.1f}x playback, starved {starved:.0%} of seconds, lost {session['lost'] / played:.1f}/s"
+        if session['stalls']:
+            target = caching * 1.5 + statistics.mean(session['stalls'])
+            reason = f"{len(session['stalls'])} stalls, {summary}"
+        elif starved > 0.2 or session['lost'] / played > self.LOST_PER_SECOND:
+            target = caching * 1.1
+            reason = summary
+        elif capacity > 3 and starved < 0.05:
+            target = caching * 0.8
+            reason = summary
+        else:
+            return
+        low, high = self.LIMITS[session['kind']]
+        target = int(min(high, max(low, round(target / 50) * 50)))
+        if target == caching:
+            return
+        print(f"{session['kind']} caching for {session['host']}: {caching} -> {target} ms ({reason})")
+        entry = self.hosts.setdefault(session['host'], {})
+        entry[session['kind']] = target
+        entry['updated'] = time.time()
+        if len(self.hosts) > self.max_hosts:
+            oldest = min(self.hosts, key=lambda h: self.hosts[h].get('updated', 0))
+            del self.hosts[oldest]
+        self.save()
@@ -0,0 +1,139 @@
+import threading
+import time
+import os
+
+class ChunkCache:
+    """Fixed-size byte chunks of remote streams on disk, LRU-evicted under a total size quota"""
+
+    def __init__(self, cache_dir, chunk_size=1024 * 1024, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.sizes = {}  # key -> total stream size, when known; shared by proxy and download threads
+        self.next_trim = 0  # no rescan before this time when the last trim found nothing evictable
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total = sum(size for _, size, _ in self.scan())
+
+    def chunk_path(self, key, index):
+        return os.path.join(self.cache_dir, key, f"{index:06d}.bin")
+
+    def has(self, key, index):
+        return os.path.exists(self.chunk_path(key, index))
+
+    def get(self, key, index):
+        path = self.chunk_path(key, index)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as the LRU clock
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Chunk cache read error: {e}")
+            return None
+
+    def put(self, key, index, data):
+        path = self.chunk_path(key, index)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)  # a re-fetched chunk only changes the total by the difference
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Chunk cache write error: {e}")
+            return
+        with self.lock:
+            self.total += len(data) - replaced
+            over = self.total > self.max_bytes and time.time() >= self.next_trim
+        if over:
+            self.trim()
+
+    def size(self, key):
+        with self.lock:
+            size = self.sizes.get(key)
+        if size is None:
+            try:
+                with open(os.path.join(self.cache_dir, key, 'size')) as f:
+                    size = int(f.read())
+            except (OSError, ValueError):
+                return None
+            with self.lock:
+                self.sizes[key] = size
+        return size
+
+    def set_size(self, key, size):
+        with self.lock:
+            if self.sizes.get(key) == size:
+                return
+            self.sizes[key] = size
+        try:
+            os.makedirs(os.path.join(self.cache_dir, key), exist_ok=True)
+            with open(os.path.join(self.cache_dir, key, 'size'), 'w') as f:
+                f.write(str(size))
+        except OSError as e:
+            print(f"Chunk cache write error: {e}")
+
+    def cached_bytes(self, key):
+        """How much of a stream is on disk, for callers deciding whether to reuse it"""
+        try:
+            return sum(os.path.getsize(os.path.join(self.cache_dir, key, name))
+                       for name in os.listdir(os.path.join(self.cache_dir, key)) if name.endswith('.bin'))
+        except OSError:
+            return 0
+
+    def scan(self):
+        chunks = []
+        for key in os.listdir(self.cache_dir):
+            folder = os.path.join(self.cache_dir, key)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                chunks.append((stat.st_mtime, stat.st_size, path))
+        return chunks
+
+    def trim(self):
+        # Evict down to 90% so a full cache doesn't rescan on every write
+        chunks = sorted(self.scan())
+        total = sum(size for _, size, _ in chunks)
+        target = self.max_bytes * 0.9
+        now = time.time()
+        for mtime, size, path in chunks:
+            if total <= target or now - mtime < 5:
+                break  # never evict what is being played right now
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        for key in os.listdir(self.cache_dir):
+            folder = os.path.join(self.cache_dir, key)
+            if os.path.isdir(folder) and not any(n.endswith('.bin') for n in os.listdir(folder)):
+                try:
+                    os.remove(os.path.join(folder, 'size'))
+                except OSError:
+                    pass
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    pass
+                with self.lock:
+                    self.sizes.pop(key, None)
+        with self.lock:
+            self.total = total
+            # Everything left was touched in the last 5 s: rescanning on each write wouldn't free
+            # anything, wait until those chunks are old enough to evict
+            self.next_trim = now + 5 if total > self.max_bytes else 0
@@ -1,37 +1,78 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-import yt_dlp
+import itertools
+import heapq
+import time
 
 class CommentFetcher(QThread):
     comments_ready = pyqtSignal(list)
+    MAX_COMMENTS = 200  # hard cap on comments pulled, whatever the video has
+    TOP_K = 100  # how many of those are kept and shown
+    FIRST_BATCH = 10  # show something as soon as this many arrived
+    BATCH_SIZE = 50
     
-    def __init__(self, video_id):
+    def __init__(self, video_id, continuation=None):
         super().__init__()
         self.video_id = video_id
+        # Comment section data left on the info dict by the resolver (ytcfg, page contents, video id)
+        self.continuation = continuation
+        self.ydl = None
+
+    def iter_comments(self):
+        if self.continuation is not None and not self.continuation['contents']:
+            return iter([])  # the watch page had no comment section
+        ydl_opts = {
+            'getcomments': True,
+            'quiet': True,
+            'skip_download': True,
+            'extractor_args': {'youtube': {'max_comments': [str(self.MAX_COMMENTS), 'all', '0'], 'comment_sort': ['top']}},
+        }
+        import yt_dlp
+        # A YoutubeDL of this thread's own, the resolver's is busy with other extractions
+        self.ydl = yt_dlp.YoutubeDL(ydl_opts)
+        if self.continuation:
+            # Only the continuation pages are requested, the page itself was downloaded by the resolver
+            ie = self.ydl.get_info_extractor('Youtube')
+            ie.initialize()
+            return ie._get_comments(self.continuation['ytcfg'], self.continuation['video_id'],
+                                    self.continuation['contents'], None)
+        # Info came from the disk cache without page data, so this needs a full pass of its own
+        info = self.ydl.extract_info(f"https://www.youtube.com/watch?v={self.video_id}", download=False)
+        return iter(info.get('comments') or [])
 
     def run(self):
-        import subprocess, json
         try:
-            # Build the command with JSON dump and comments
-            cmd = [
-                "yt-dlp",
-                "--write-comments",
-                "--dump-single-json",
-                f"https://www.youtube.com/watch?v={self.video_id}"
-            ]
-            output = subprocess.check_output(cmd, text=True)
-            info = json.loads(output)
-            comments = info.get('comments', [])
-            # Ensure each comment has a like_count and author_thumbnail field
+            # Min-heap of (likes, -arrival) keeps the best TOP_K without ever holding or sorting the rest;
+            # on equal likes the earlier comment wins since YouTube already sends them ranked
+            top = []
             default_thumb = "https://via.placeholder.com/40"
-            for comment in comments:
-                if 'like_count' not in comment:
-                    comment['like_count'] = 0
+            next_emit = self.FIRST_BATCH
+            last_emit = time.time()
+            count = 0
+            for count, comment in enumerate(itertools.islice(self.iter_comments(), self.MAX_COMMENTS), 1):
+                if self.isInterruptionRequested():
+                    return
+                # Ensure each comment has a like_count and author_thumbnail field
+                comment['like_count'] = comment.get('like_count') or 0
                 if not comment.get('author_thumbnail'):
                     comment['author_thumbnail'] = default_thumb
-            # Sort comments by like_count in descending order and take top 50
-            comments = sorted(comments, key=lambda x: x['like_count'], reverse=True)[:100]
-            # Print JSON of comments for debugging
-            self.comments_ready.emit(comments)
+                entry = (comment['like_count'], -count, comment)
+                if len(top) < self.TOP_K:
+                    heapq.heappush(top, entry)
+                else:
+                    heapq.heappushpop(top, entry)
+                if count >= next_emit or time.time() - last_emit > 1:
+                    self.emit_ranked(top)
+                    next_emit = count + self.BATCH_SIZE
+                    last_emit = time.time()
+            if not self.isInterruptionRequested():
+                self.emit_ranked(top)
+            print(f"Fetched {count} comments for: {self.video_id}")
         except Exception as e:
             print(f"Error fetching comments: {str(e)}")
             self.comments_ready.emit([])
+        finally:
+            if self.ydl:
+                self.ydl.close()
+
+    def emit_ranked(self, top):
+        self.comments_ready.emit([comment for _, _, comment in sorted(top, key=lambda e: e[:2], reverse=True)])
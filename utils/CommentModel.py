@@ -0,0 +1,151 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainterPath
+
+class CommentListModel(QAbstractListModel):
+    """Ranked comments exposed a page at a time; the view pulls more rows as it scrolls"""
+    CommentRole = Qt.UserRole + 1
+    PAGE_SIZE = 20
+
+    def __init__(self, image_loader, parent=None):
+        super().__init__(parent)
+        self.image_loader = image_loader
+        self.image_loader.image_ready.connect(self.on_image_ready)
+        self.comments = []
+        self.loaded = 0  # rows exposed to the view so far
+        self.status = ""  # shown as the only row while there are no comments
+        self.rows_by_thumb = {}  # avatar url -> rows using it
+
+    def set_status(self, text):
+        self.beginResetModel()
+        self.comments = []
+        self.loaded = 0
+        self.rows_by_thumb = {}
+        self.status = text
+        self.endResetModel()
+
+    def set_comments(self, comments):
+        """Swap in a new ranking, keeping however many rows the user already scrolled through"""
+        if not comments:
+            self.set_status("No comments available")
+            return
+        self.beginResetModel()
+        self.status = ""
+        self.comments = comments
+        self.loaded = min(len(comments), max(self.loaded, self.PAGE_SIZE))
+        self.rows_by_thumb = {}
+        for row, comment in enumerate(comments):
+            self.rows_by_thumb.setdefault(comment.get('author_thumbnail', ''), []).append(row)
+        self.endResetModel()
+        self.image_loader.clear_pending()  # the old ranking's avatars may never be painted
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.loaded if self.comments else int(bool(self.status))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.comments)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.PAGE_SIZE, len(self.comments) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.comments:
+            return self.status if role == Qt.DisplayRole else None
+        comment = self.comments[index.row()]
+        if role == Qt.DisplayRole:
+            return comment.get('text', '')
+        if role == self.CommentRole:
+            return comment
+        if role == Qt.DecorationRole:
+            # Only asked for rows being painted, so only visible avatars are ever fetched
+            return self.image_loader.get(comment.get('author_thumbnail', ''))
+        return None
+
+    def on_image_ready(self, url, image):
+        for row in self.rows_by_thumb.get(url, []):
+            if row < self.loaded:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class CommentDelegate(QStyledItemDelegate):
+    """Paints one comment card; only rows in the viewport are ever laid out or painted"""
+    PADDING = 10
+    AVATAR = 20
+    SPACING = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text_font = QFont("Arial", 9)
+        self.author_font = QFont("Arial", 9, QFont.Bold)
+        self.likes_font = QFont("Arial", 8)
+
+    def text_rect(self, rect):
+        top = self.PADDING + self.AVATAR + self.SPACING
+        return QRect(rect.left() + self.PADDING, rect.top() + top,
+                     rect.width() - 2 * self.PADDING, max(0, rect.height() - top - self.PADDING))
+
+    def sizeHint(self, option, index):
+        # Wrap against the viewport the card will really be painted in
+        view = self.parent()
+        width = view.viewport().width() if view else option.rect.width()
+        text = index.data(Qt.DisplayRole) or ""
+        if index.data(CommentListModel.CommentRole) is None:
+            return QSize(width, QFontMetrics(self.text_font).height() + 2 * self.PADDING)
+        text_height = QFontMetrics(self.text_font).boundingRect(
+            QRect(0, 0, max(50, width - 2 * self.PADDING), 100000), Qt.TextWordWrap, text).height()
+        return QSize(width, self.PADDING * 2 + self.AVATAR + self.SPACING + text_height + self.SPACING)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        comment = index.data(CommentListModel.CommentRole)
+        card = option.rect.adjusted(0, 0, 0, -self.SPACING)
+        if comment is None:
+            painter.setPen(QColor('white'))
+            painter.setFont(self.text_font)
+            painter.drawText(card.adjusted(self.PADDING, 0, 0, 0), Qt.AlignVCenter, index.data(Qt.DisplayRole) or "")
+            painter.restore()
+            return
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor('#404040' if option.state & QStyle.State_MouseOver else '#333333'))
+        painter.drawRoundedRect(QRectF(card), 8, 8)
+
+        # Avatar, clipped to a circle, grey until the image loader delivers it
+        avatar_rect = QRect(card.left() + self.PADDING, card.top() + self.PADDING, self.AVATAR, self.AVATAR)
+        image = index.data(Qt.DecorationRole)
+        if image is not None:
+            path = QPainterPath()
+            path.addEllipse(QRectF(avatar_rect))
+            painter.setClipPath(path)
+            painter.drawImage(avatar_rect, image)
+            painter.setClipping(False)
+        else:
+            painter.setBrush(QColor('#555555'))
+            painter.drawEllipse(avatar_rect)
+
+        # Author and like count on the header line
+        x = avatar_rect.right() + self.SPACING
+        painter.setPen(QColor('#FF4500'))
+        painter.setFont(self.author_font)
+        author = comment.get('author', 'Anonymous')
+        painter.drawText(QRect(x, avatar_rect.top(), card.right() - x, self.AVATAR), Qt.AlignVCenter, author)
+        x += QFontMetrics(self.author_font).horizontalAdvance(author) + self.SPACING
+        painter.setPen(QColor('#AAAAAA'))
+        painter.setFont(self.likes_font)
+        painter.drawText(QRect(x, avatar_rect.top(), max(0, card.right() - x), self.AVATAR),
+                         Qt.AlignVCenter, f"• {comment.get('like_count', 0)} likes")
+
+        painter.setPen(QColor('white'))
+        painter.setFont(self.text_font)
+        painter.drawText(self.text_rect(card), Qt.TextWordWrap, index.data(Qt.DisplayRole) or "")
+        painter.restore()
@@ -0,0 +1,65 @@
+from xml.sax.saxutils import escape, quoteattr
+
+class DashManifest:
+    """Static on-demand MPD for one video: a video ladder and one audio track, each a single
+    SegmentBase file, so VLC's adaptive demuxer can switch bitrate on one timeline"""
+
+    def __init__(self, duration, videos, audio):
+        self.duration = duration
+        self.videos = videos
+        self.audio = audio
+
+    @staticmethod
+    def usable(fmt):
+        # Without the sidx location VLC can only play a representation start to end; the
+        # manifest declares ISO BMFF, WebM streams are played as a plain pair instead
+        return bool(fmt.get('init_range') and fmt.get('index_range') and fmt.get('url')
+                    and fmt.get('ext') in ('mp4', 'm4a'))
+
+    @staticmethod
+    def bandwidth(fmt, duration):
+        kbps = fmt.get('tbr') or fmt.get('vbr') or fmt.get('abr')
+        if not kbps and fmt.get('filesize') and duration:
+            kbps = fmt['filesize'] * 8 / 1000 / duration
+        return int((kbps or 1000) * 1000)
+
+    def representation(self, fmt, codecs, url_for, extra):
+        return (f'      <Representation id={quoteattr(str(fmt.get("format_id")))} codecs={quoteattr(codecs)} '
+                f'bandwidth="{self.bandwidth(fmt, self.duration)}"{extra}>\n'
+                f'{self.channels(fmt)}'
+                f'        <BaseURL>{escape(url_for(fmt["url"]))}</BaseURL>\n'
+                f'        <SegmentBase indexRange="{fmt["index_range"]}">'
+                f'<Initialization range="{fmt["init_range"]}"/></SegmentBase>\n'
+                f'      </Representation>\n')
+
+    @staticmethod
+    def channels(fmt):
+        if fmt.get('vcodec', 'none') != 'none' or not fmt.get('audio_channels'):
+            return ''
+        return ('        <AudioChannelConfiguration schemeIdUri="urn:mpeg:dash:23003:3:audio_channel_configuration:2011" '
+                f'value="{fmt["audio_channels"]}"/>\n')
+
+    def render(self, url_for=lambda url: url):
+        """MPD text; url_for maps each stream URL, e.g. onto the local range proxy"""
+        videos = []
+        for fmt in sorted(self.videos, key=lambda f: self.bandwidth(f, self.duration)):
+            extra = f' width="{fmt.get("width") or 0}" height="{fmt.get("height") or 0}"'
+            if fmt.get('fps'):
+                extra += f' frameRate="{int(fmt["fps"])}"'
+            videos.append(self.representation(fmt, fmt.get('vcodec', ''), url_for, extra))
+        audio_rate = f' audioSamplingRate="{self.audio["asr"]}"' if self.audio.get('asr') else ''
+        audio = self.representation(self.audio, self.audio.get('acodec', ''), url_for, audio_rate)
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011" '
+                f'type="static" mediaPresentationDuration="PT{float(self.duration):.3f}S" minBufferTime="PT1.5S">\n'
+                '  <Period>\n'
+                '    <AdaptationSet mimeType="video/mp4" contentType="video" segmentAlignment="true" '
+                'subsegmentAlignment="true" subsegmentStartsWithSAP="1">\n'
+                f'{"".join(videos)}'
+                '    </AdaptationSet>\n'
+                '    <AdaptationSet mimeType="audio/mp4" contentType="audio" subsegmentAlignment="true" '
+                'subsegmentStartsWithSAP="1">\n'
+                f'{audio}'
+                '    </AdaptationSet>\n'
+                '  </Period>\n'
+                '</MPD>\n')
@@ -0,0 +1,155 @@
+from PyQt5.QtCore import QThread
+import subprocess
+import platform
+import shutil
+import json
+import time
+import re
+import os
+
+class DecodeBenchmark(QThread):
+    """Measures software decode speed per codec and height once per machine and remembers it
+
+    Hardware decoding is off in the player, so whether AV1 or VP9 keeps up is down to the CPU.
+    Clips are encoded locally with the bundled ffmpeg (no sample media ships with the app) and
+    decoded through the same libavcodec/dav1d family VLC uses.
+    """
+
+    HEIGHTS = (720, 1080, 1440, 2160)
+    ENCODERS = {
+        'h264': [['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '26']],
+        'vp9': [['-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8', '-row-mt', '1',
+                 '-b:v', '0', '-crf', '36']],
+        'av1': [['-c:v', 'libsvtav1', '-preset', '12', '-crf', '40'],
+                ['-c:v', 'libaom-av1', '-usage', 'realtime', '-cpu-used', '9', '-row-mt', '1', '-crf', '40']],
+    }
+    EXTS = {'h264': 'mp4', 'vp9': 'webm', 'av1': 'mp4'}
+    CLIP_FPS = 30
+    CLIP_SECONDS = 3
+    HEADROOM = 1.3  # the player also scales, composites and runs the UI on the same cores
+
+    def __init__(self, path, work_dir):
+        super().__init__()
+        self.path = path
+        self.work_dir = work_dir
+        self.ffmpeg = self.find_ffmpeg()
+        self.results = {}  # codec -> {height (str): decoded frames per second}
+        # ffmpeg the last finished run used; kept even when no encoder worked, so it isn't redone every launch
+        self.benchmarked = None
+        self.load()
+
+    @staticmethod
+    def find_ffmpeg():
+        # Same bundled copy the downloader uses, else whatever is on PATH
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        name = 'ffmpeg.exe' if os.name == 'nt' else 'ffmpeg'
+        bundled = os.path.join(script_dir, 'ffmpeg', 'bin', name)
+        return bundled if os.path.exists(bundled) else shutil.which('ffmpeg')
+
+    def ffmpeg_build(self):
+        """Identifies the ffmpeg binary (path, size, mtime) without running it on the GUI thread"""
+        try:
+            stat = os.stat(self.ffmpeg)
+        except (OSError, TypeError):
+            return None
+        return {'path': self.ffmpeg, 'build': f"{stat.st_size}:{int(stat.st_mtime)}"}
+
+    @staticmethod
+    def machine():
+        return f"{platform.machine()}|{platform.processor()}|{os.cpu_count()}"
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # A different CPU makes the old numbers meaningless
+            if saved.get('machine') == self.machine():
+                self.results = saved.get('results', {})
+                self.benchmarked = saved.get('ffmpeg')
+        except Exception as e:
+            print(f"Decode benchmark read error: {e}")
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'machine': self.machine(), 'ffmpeg': self.benchmarked, 'measured': time.time(),
+                           'results': self.results}, f)
+        except Exception as e:
+            print(f"Decode benchmark write error: {e}")
+
+    def needed(self):
+        # Redone only for a new CPU (load drops the marker) or another ffmpeg build
+        return bool(self.ffmpeg) and self.benchmarked != self.ffmpeg_build()
+
+    def realtime(self, codec, height, fps=30):
+        """True/False if the codec decodes this height fast enough, None when it was never measured"""
+        speeds = self.results.get(codec)
+        if not speeds:
+            return None
+        measured = sorted((int(h), rate) for h, rate in speeds.items())
+        needed = (fps or 30) * self.HEADROOM
+        for measured_height, rate in measured:
+            if measured_height >= height:
+                return rate >= needed
+        # Taller than anything measured: decode time grows with the pixel count
+        measured_height, rate = measured[-1]
+        return rate * (measured_height / height) ** 2 >= needed
+
+    def clip(self, codec, height):
+        """Encode (once) a short noisy test clip; returns its path or None if no encoder works"""
+        path = os.path.join(self.work_dir, f"{codec}_{height}.{self.EXTS[codec]}")
+        if os.path.exists(path):
+            return path
+        width = height * 16 // 9
+        source = ['-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate={self.CLIP_FPS}",
+                  '-t', str(self.CLIP_SECONDS), '-vf', 'noise=alls=12:allf=t', '-pix_fmt', 'yuv420p']
+        for encoder in self.ENCODERS[codec]:
+            tmp_path = path + '.part.' + self.EXTS[codec]
+            result = subprocess.run([self.ffmpeg, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y',
+                                     *source, *encoder, '-an', tmp_path],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=600)
+            if result.returncode == 0:
+                os.replace(tmp_path, path)
+                return path
+        return None
+
+    def decode_fps(self, path):
+        frames = self.CLIP_FPS * self.CLIP_SECONDS
+        started = time.perf_counter()
+        result = subprocess.run([self.ffmpeg, '-hide_banner', '-nostdin', '-benchmark', '-threads', '0',
+                                 '-i', path, '-f', 'null', '-'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            return None
+        # -benchmark reports the decode time without process startup and probing
+        match = re.search(rb"rtime=([\d.]+)s", result.stderr)
+        if match and float(match.group(1)) > 0:
+            elapsed = float(match.group(1))
+        return frames / elapsed
+
+    def run(self):
+        results = {}
+        try:
+            self.setPriority(QThread.LowestPriority)
+            os.makedirs(self.work_dir, exist_ok=True)
+            for codec in self.ENCODERS:
+                for height in self.HEIGHTS:
+                    if self.isInterruptionRequested():
+                        return  # app closing, measure again next launch
+                    path = self.clip(codec, height)
+                    fps = self.decode_fps(path) if path else None
+                    if fps is None:
+                        break
+                    results.setdefault(codec, {})[str(height)] = round(fps, 1)
+                    print(f"Decode benchmark: {codec} {height}p at {fps:.0f} fps")
+                    if fps < 60 * self.HEADROOM:
+                        break  # taller clips of this codec only get slower
+        except Exception as e:
+            print(f"Decode benchmark error: {e}")
+        # Saved even when nothing could be measured: the same ffmpeg would fail the same way again
+        self.results = results
+        self.benchmarked = self.ffmpeg_build()
+        self.save()
@@ -0,0 +1,185 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from collections import deque
+import copy
+from utils.Downloader import Downloader
+from utils.MediaProcessor import MediaProcessor
+
+class DownloadManager(QObject):
+    """Queue of video/MP3 downloads, a bounded number running at once
+
+    A job is finished once its ffmpeg work (MP3 encode, remux) is done too; that runs on the
+    MediaProcessor pool and doesn't hold a download slot.
+    """
+    job_progress = pyqtSignal(int, str, float, float, float)  # job id, kind, fraction, bytes/s, eta s (-1 unknown)
+    job_finished = pyqtSignal(int, str)  # job id, kind
+    job_failed = pyqtSignal(int, str, str)  # job id, kind, error
+    job_processing = pyqtSignal(int, str, float)  # job id, kind, fraction of its ffmpeg work
+
+    FOREGROUND = 0  # ffmpeg work of a download someone clicked and is waiting on
+    BACKLOG = 10  # library conversions, run on whatever cores the downloads leave
+
+    def __init__(self, bandwidth_estimator=None, stream_proxy=None, max_concurrent=2, fragments=4, parent=None):
+        super().__init__(parent)
+        self.bandwidth_estimator = bandwidth_estimator
+        self.stream_proxy = stream_proxy  # lets a download reuse what playback already cached
+        # 2 jobs x 4 fragment connections fill most links; more only adds seeks on the disk
+        self.max_concurrent = max_concurrent
+        self.fragments = fragments
+        self.next_id = 0
+        self.pending = deque()  # (job_id, url, kind)
+        self.sessions = {}  # job_id -> playback session handed to the downloader
+        self.priorities = {}  # job_id -> MediaProcessor priority of its ffmpeg work
+        self.running = {}  # job_id -> (Downloader, url, kind)
+        self.processing = {}  # job_id -> {'url', 'kind', 'tasks', 'error'} while its files are in the pool
+        self.task_jobs = {}  # MediaProcessor task id -> job_id
+        self.processor = MediaProcessor(Downloader.ffmpeg_location(), parent=self)
+        self.processor.task_progress.connect(self.on_task_progress)
+        self.processor.task_finished.connect(lambda task_id, path: self.on_task_done(task_id, None))
+        self.processor.task_failed.connect(self.on_task_done)
+
+    def enqueue(self, url, kind='video', session=None, priority=FOREGROUND):
+        """Queue a download, return its job id (the existing one if it is already queued or running)
+
+        session is the app's playback state for this video (info dict and streamed formats), if any.
+        """
+        for job_id, job_url, job_kind in self.pending:
+            if (job_url, job_kind) == (url, kind):
+                return job_id
+        for job_id, (_, job_url, job_kind) in self.running.items():
+            if (job_url, job_kind) == (url, kind):
+                return job_id
+        for job_id, job in self.processing.items():
+            if (job['url'], job['kind']) == (url, kind):
+                return job_id
+        self.next_id += 1
+        self.pending.append((self.next_id, url, kind))
+        self.priorities[self.next_id] = priority
+        if session:
+            # yt-dlp fills in requested_formats, filepath etc. on the info it processes; this copy keeps
+            # that off the dict the player and the InfoCache share, and is made here on the GUI thread
+            self.sessions[self.next_id] = dict(session, info=copy.deepcopy(session['info']))
+        self.start_next()
+        return self.next_id
+
+    def convert(self, paths, kind='mp3', container='mp4', output_dir=None):
+        """Queue existing files for MP3 extraction (kind 'mp3') or a remux, behind any download
+
+        One job covering all of them, reported like a download; returns its id or None. The
+        originals are kept.
+        """
+        paths = [path for path in paths if path]
+        if not paths:
+            return None
+        self.next_id += 1
+        job = {'url': None, 'kind': kind, 'tasks': set(), 'error': None}
+        for path in paths:
+            mode, ext = ('audio', 'mp3') if kind == 'mp3' else ('remux', container)
+            task_id = self.processor.submit(path, mode, ext, priority=self.BACKLOG, output_dir=output_dir,
+                                            keep_source=True)
+            self.task_jobs[task_id] = self.next_id
+            job['tasks'].add(task_id)
+        self.processing[self.next_id] = job
+        print(f"Queued {len(paths)} files for {kind} conversion as job {self.next_id}")
+        return self.next_id
+
+    def jobs(self, kind=None):
+        """(job id, url or None for conversions, state) of every job queued, downloading or processing"""
+        jobs = [(job_id, url, 'queued') for job_id, url, k in self.pending if kind in (None, k)]
+        jobs += [(job_id, url, 'downloading') for job_id, (_, url, k) in self.running.items() if kind in (None, k)]
+        jobs += [(job_id, job['url'], 'processing') for job_id, job in self.processing.items()
+                 if job_id not in self.running and kind in (None, job['kind'])]
+        return jobs
+
+    def cancel(self, job_id):
+        """Drop a queued job, abort its download or kill its ffmpeg work; it reports job_failed"""
+        for job in self.pending:
+            if job[0] == job_id:
+                self.pending.remove(job)
+                self.sessions.pop(job_id, None)
+                self.priorities.pop(job_id, None)
+                self.job_failed.emit(job_id, job[2], "Cancelled")
+                return
+        if job_id in self.running:
+            self.running[job_id][0].cancel()  # fails with "Cancelled", on_done drops its handed-off work
+        for task_id in list(self.processing.get(job_id, {}).get('tasks', ())):
+            self.processor.cancel(task_id)
+
+    def active(self, kind=None):
+        """Jobs queued or running, optionally only of one kind"""
+        kinds = [job[2] for job in self.pending] + [job[2] for job in self.running.values()]
+        kinds += [job['kind'] for job_id, job in self.processing.items() if job_id not in self.running]
+        return sum(1 for k in kinds if kind is None or k == kind)
+
+    def start_next(self):
+        while self.pending and len(self.running) < self.max_concurrent:
+            job_id, url, kind = self.pending.popleft()
+            thread = Downloader(url, kind, self.bandwidth_estimator, fragments=self.fragments,
+                                session=self.sessions.pop(job_id, None), stream_proxy=self.stream_proxy)
+            thread.progress.connect(lambda fraction, speed, eta, j=job_id, k=kind:
+                                    self.job_progress.emit(j, k, fraction, speed, eta))
+            thread.handoff.connect(lambda path, mode, ext, j=job_id: self.process(j, path, mode, ext))
+            thread.finished.connect(lambda j=job_id: self.on_done(j, None))
+            thread.error.connect(lambda error, j=job_id: self.on_done(j, error))
+            self.running[job_id] = (thread, url, kind)
+            print(f"Starting {kind} download {job_id}: {url} ({len(self.pending)} queued)")
+            # Downloads are background work, playback and the UI come first
+            thread.start(QThread.LowPriority)
+
+    def on_done(self, job_id, error):
+        thread, url, kind = self.running.pop(job_id, (None, None, None))
+        if thread is None:
+            return
+        thread.wait()  # run() returns right after the signal, drop the reference only once it has
+        self.priorities.pop(job_id, None)
+        if thread.cancelled and not error:
+            error = "Cancelled"  # cancelled too late to stop yt-dlp, its files still aren't wanted
+        if error:
+            job = self.processing.pop(job_id, None)
+            for task_id in job['tasks'] if job else ():
+                self.processor.cancel(task_id)  # a failed or cancelled download's files are of no use
+            self.job_failed.emit(job_id, kind, error)
+        elif self.processing.get(job_id, {}).get('tasks'):
+            pass  # finishes with its last task
+        else:
+            job = self.processing.pop(job_id, None)
+            if job and job['error']:
+                self.job_failed.emit(job_id, kind, job['error'])
+            else:
+                self.job_finished.emit(job_id, kind)
+        self.start_next()
+
+    def process(self, job_id, path, mode, ext):
+        # Handed off while the download thread is still running
+        if job_id not in self.running:
+            return
+        _, url, kind = self.running[job_id]
+        task_id = self.processor.submit(path, mode, ext, priority=self.priorities.get(job_id, self.FOREGROUND))
+        self.task_jobs[task_id] = job_id
+        job = self.processing.setdefault(job_id, {'url': url, 'kind': kind, 'tasks': set(), 'error': None})
+        job['tasks'].add(task_id)
+
+    def on_task_progress(self, task_id, fraction):
+        job_id = self.task_jobs.get(task_id)
+        if job_id in self.processing:
+            self.job_processing.emit(job_id, self.processing[job_id]['kind'], fraction)
+
+    def on_task_done(self, task_id, error):
+        job_id = self.task_jobs.pop(task_id, None)
+        if job_id not in self.processing:
+            return
+        job = self.processing[job_id]
+        job['tasks'].discard(task_id)
+        if error:
+            print(f"Processing for {job['kind']} download {job_id} failed: {error}")
+            job['error'] = error
+        if job['tasks'] or job_id in self.running:
+            return
+        del self.processing[job_id]
+        if job['error']:
+            self.job_failed.emit(job_id, job['kind'], job['error'])
+        else:
+            self.job_finished.emit(job_id, job['kind'])
+
+    def shutdown(self):
+        """Stop the ffmpeg pool, for app exit"""
+        self.processor.shutdown()
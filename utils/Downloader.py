@@ -1,22 +1,98 @@
 from PyQt5.QtCore import QThread, pyqtSignal
+from utils.SegmentedFetcher import SegmentedFetcher
+import time
 import os
-import yt_dlp
 
 class Downloader(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
-    progress = pyqtSignal(float)
+    progress = pyqtSignal(float, float, float)  # fraction of the current file, bytes/s, eta s (-1 unknown)
+    handoff = pyqtSignal(str, str, str)  # downloaded file, ffmpeg job for the MediaProcessor, target extension
 
-    def __init__(self, url, download_type='video'):
+    def __init__(self, url, download_type='video', bandwidth_estimator=None, fragments=1, progress_interval=0.5,
+                 session=None, stream_proxy=None, container='mp4'):
         super().__init__()
         self.url = url
         self.download_type = download_type
+        self.bandwidth_estimator = bandwidth_estimator
+        self.fragments = fragments  # parallel connections for fragmented (DASH/HLS) formats
+        # The playback session of this video (info dict and the formats streamed), if it is the one playing
+        self.session = session
+        self.stream_proxy = stream_proxy  # its chunk cache holds whatever playback already fetched
+        self.container = container  # mp4 or mkv; mp4 falls back to mkv for codecs it can't hold
+        self.progress_interval = progress_interval  # yt-dlp calls the hook per block, the GUI needs far less
+        self.last_progress = 0
+        self.cancelled = False
         self.ydl_opts = None
 
-    def configure_download(self):
+    def cancel(self):
+        """Abort at the next progress report, run() then reports the error Cancelled"""
+        self.cancelled = True
+
+    def progress_hook(self, d):
+        if self.cancelled:
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled("Cancelled")
+        if d.get('status') == 'downloading':
+            now = time.monotonic()
+            if now - self.last_progress < self.progress_interval:
+                return
+            self.last_progress = now
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            fraction = min(1.0, d.get('downloaded_bytes', 0) / total) if total else 0.0
+            eta = d.get('eta')
+            self.progress.emit(fraction, float(d.get('speed') or 0), float(eta if eta is not None else -1))
+            return
+        if d.get('status') != 'finished':
+            return
+        self.progress.emit(1.0, 0.0, 0.0)
+        # A finished download is a clean measurement of what the link sustains
+        if not self.bandwidth_estimator:
+            return
+        if 'fetched_bytes' in d:
+            size = d['fetched_bytes']  # SegmentedFetcher: the file may be mostly resumed or reused
+        else:
+            size = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+        elapsed = d.get('elapsed') or 0
+        if size > 1024 * 1024 and elapsed > 1:
+            self.bandwidth_estimator.add_sample(size / elapsed, 'download')
+
+    def accelerate(self, ydl):
+        """Route plain HTTP(S) streams through SegmentedFetcher instead of yt-dlp's single connection"""
+        original_dl = ydl.dl
+
+        def dl(name, info, subtitle=False, test=False):
+            if (test or subtitle or name == '-' or info.get('protocol', 'https') not in ('https', 'http')
+                    or info.get('requested_formats')):
+                return original_dl(name, info, subtitle, test)
+            size = info.get('filesize')
+            if os.path.exists(name) and size and os.path.getsize(name) == size:
+                print(f"Already downloaded: {name}")
+                return True, False
+            headers = info.get('http_headers') or ydl._calc_headers(info)
+            cache_key = self.stream_proxy.stream_key(info['url'], info.get('id')) if self.stream_proxy else None
+            if cache_key and not self.stream_proxy.cache.cached_bytes(cache_key):
+                cache_key = None  # never streamed, nothing to reuse
+            fetcher = SegmentedFetcher(info['url'], name, size, headers, connections=max(self.fragments, 1),
+                                       progress_hook=self.progress_hook,
+                                       cache=self.stream_proxy.cache if cache_key else None, cache_key=cache_key)
+            if not cache_key and fetcher.size is not None and fetcher.size < 2 * fetcher.chunk_size:
+                return original_dl(name, info, subtitle, test)  # one range, nothing to parallelize
+            if not fetcher.fetch():
+                return original_dl(name, info, subtitle, test)
+            return True, True
+
+        ydl.dl = dl
+
+    @staticmethod
+    def ffmpeg_location():
         # Get the TYP root directory (two levels up from utils)
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        ffmpeg_path = os.path.join(script_dir, 'ffmpeg', 'bin', 'ffmpeg.exe')
+        return os.path.join(script_dir, 'ffmpeg', 'bin', 'ffmpeg.exe')
+
+    def configure_download(self):
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ffmpeg_path = self.ffmpeg_location()
         
         if not os.path.exists(ffmpeg_path):
             self.error.emit(f"FFmpeg not found at: {ffmpeg_path}")
@@ -28,20 +104,18 @@ class Downloader(QThread):
             if not os.path.exists(downloads_dir):
                 os.makedirs(downloads_dir)
 
+            # Separate best streams, stream-copied together: no transcode, and the merger
+            # deletes the video/audio intermediates (keepvideo off) so only one copy stays
             self.ydl_opts = {
                 'ffmpeg_location': ffmpeg_path,
-                'format': 'best',
+                'format': 'bestvideo*+bestaudio/best',
                 'outtmpl': os.path.join(downloads_dir, '%(title)s.%(ext)s'),
-                'merge_output_format': 'mp4',
+                'merge_output_format': 'mp4/mkv' if self.container == 'mp4' else 'mkv',
                 'writethumbnail': True,
-                'keepvideo': True,
+                'keepvideo': False,
                 'quiet': False,
                 'verbose': True,
                 'no_warnings': False,
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',
-                }],
             }
         else:  # mp3
             # Use mp3 directory in TYP root
@@ -49,28 +123,55 @@ class Downloader(QThread):
             if not os.path.exists(mp3_dir):
                 os.makedirs(mp3_dir)
 
+            # The MP3 encode happens in the MediaProcessor pool, this thread only downloads
             self.ydl_opts = {
                 'ffmpeg_location': ffmpeg_path,
                 'format': 'bestaudio/best',
                 'outtmpl': os.path.join(mp3_dir, '%(title)s.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '320',
-                }],
                 'quiet': False,
                 'verbose': True,
                 'no_warnings': False,
             }
+        if self.session:
+            video_format, audio_format = self.session['video_format'], self.session['audio_format']
+            if self.download_type == 'video':
+                self.ydl_opts['format'] = f"{video_format['format_id']}+{audio_format['format_id']}"
+            else:
+                self.ydl_opts['format'] = audio_format['format_id']
         return True
 
+    def hand_off(self, path):
+        """Queue the ffmpeg work a finished file still needs instead of running it on this thread"""
+        ext = os.path.splitext(path)[1][1:].lower()
+        if self.download_type == 'mp3':
+            if ext != 'mp3':
+                self.handoff.emit(path, 'audio', 'mp3')
+        elif ext not in (self.container, 'mkv', 'webm'):
+            # Merged files already are mp4/mkv, webm and mkv single files play as they are
+            self.handoff.emit(path, 'remux', self.container)
+
     def run(self):
         try:
             if not self.configure_download():
                 return
+            self.ydl_opts['progress_hooks'] = [self.progress_hook]
+            self.ydl_opts['concurrent_fragment_downloads'] = self.fragments
+            # Ranged requests of this size dodge YouTube's per-connection throttling on single files
+            self.ydl_opts['http_chunk_size'] = 10 * 1024 * 1024
+
+            import yt_dlp  # imported on this thread, keeps it off the startup path
 
+            files = []
             with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                ydl.download([self.url])
+                self.accelerate(ydl)
+                ydl.add_post_hook(files.append)  # final path of each file, after merging
+                if self.session:
+                    # No second extraction: the formats playback resolved (and partly cached) are reused
+                    ydl.process_ie_result(ydl.sanitize_info(self.session['info'], True), download=True)
+                else:
+                    ydl.download([self.url])
+            for path in files:
+                self.hand_off(path)
             self.finished.emit()
         except Exception as e:
-            self.error.emit(str(e))
+            self.error.emit("Cancelled" if self.cancelled else str(e))
@@ -0,0 +1,127 @@
+from utils.DashManifest import DashManifest
+
+class FormatSelector:
+    """Picks the video/audio pair to stream from a resolved info dict's full format list"""
+    VIDEO_EXTS = ('mp4', 'webm')
+    AUDIO_EXTS = ('m4a',)
+    EFFICIENCY = {'h264': 0, 'vp9': 1, 'av1': 2}  # same picture in fewer bits, at more CPU per frame
+
+    def __init__(self, bandwidth_estimator=None, decode_benchmark=None, default_max_height=1080, headroom=0.75):
+        self.bandwidth_estimator = bandwidth_estimator
+        self.decode_benchmark = decode_benchmark
+        self.default_max_height = default_max_height  # cap used until we have throughput history
+        self.headroom = headroom  # share of the estimated link the streams may use
+
+    @staticmethod
+    def bitrate(fmt, duration, kind):
+        """Bitrate in kbit/s from whatever the format reports"""
+        rate = fmt.get(kind) or fmt.get('tbr')
+        if rate:
+            return rate
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if size and duration:
+            return size * 8 / 1000 / duration
+        return None
+
+    @staticmethod
+    def is_direct(fmt):
+        # Plain progressive URLs only; VLC gets manifests and fragments elsewhere
+        return bool(fmt.get('url')) and fmt.get('protocol', 'https') in ('https', 'http')
+
+    @staticmethod
+    def codec(fmt):
+        vcodec = (fmt.get('vcodec') or '').lower()
+        if vcodec.startswith(('avc1', 'h264')):
+            return 'h264'
+        if vcodec.startswith(('vp9', 'vp09')):
+            return 'vp9'
+        if vcodec.startswith(('av01', 'av1')):
+            return 'av1'
+        return None
+
+    def decodable(self, fmt):
+        # Unmeasured machines only get H.264, which every CPU this app runs on handles up to 1080p
+        codec = self.codec(fmt)
+        if codec is None:
+            return False
+        verdict = self.decode_benchmark.realtime(codec, fmt['height'], fmt.get('fps')) if self.decode_benchmark else None
+        if verdict is None:
+            return codec == 'h264'
+        return verdict
+
+    def video_candidates(self, info):
+        return [f for f in info.get('formats') or []
+                if self.is_direct(f) and f.get('vcodec', 'none') != 'none' and f.get('acodec', 'none') == 'none'
+                and f.get('ext') in self.VIDEO_EXTS and f.get('height')]
+
+    def audio_candidates(self, info):
+        return [f for f in info.get('formats') or []
+                if self.is_direct(f) and f.get('acodec', 'none') != 'none' and f.get('vcodec', 'none') == 'none'
+                and f.get('ext') in self.AUDIO_EXTS]
+
+    @staticmethod
+    def height_cap(videos, surface=None, limit=None):
+        """Tallest height worth decoding: the smallest format that already covers the surface (physical px)"""
+        caps = [limit] if limit else []
+        if surface:
+            width, height = surface
+            covering = [f['height'] for f in videos if f['height'] >= height or (f.get('width') or 0) >= width]
+            if covering:
+                caps.append(min(covering))
+        return min(caps) if caps else float('inf')
+
+    def select(self, info, surface=None):
+        """Return (video_format, audio_format), or (None, None) to fall back to yt-dlp's own choice"""
+        duration = info.get('duration')
+        audio = max(self.audio_candidates(info),
+                    key=lambda f: self.bitrate(f, duration, 'abr') or 0, default=None)
+        videos = self.video_candidates(info)
+        if not audio or not videos:
+            return None, None
+        # A codec the CPU can't keep up with drops frames no matter how fast the link is
+        videos = [f for f in videos if self.decodable(f)] or [
+            min(videos, key=lambda f: (self.EFFICIENCY.get(self.codec(f), 3), f['height']))]
+        estimate = self.bandwidth_estimator.estimate() if self.bandwidth_estimator else None
+        # Software decoding 1080p into a 600 px tall widget only burns CPU and bandwidth
+        cap = self.height_cap(videos, surface, self.default_max_height if estimate is None else None)
+        videos = [f for f in videos if f['height'] <= cap] or [min(videos, key=lambda f: f['height'])]
+        if estimate is None:
+            fitting = videos
+        else:
+            # Highest bitrate whose video + audio stays inside the sustainable share of the link
+            budget = estimate * 8 / 1000 * self.headroom - (self.bitrate(audio, duration, 'abr') or 128)
+            fitting = [f for f in videos if (self.bitrate(f, duration, 'vbr') or float('inf')) <= budget]
+            if not fitting:
+                # Even the smallest doesn't fit, start as low as possible rather than stall at 1080p
+                fitting = [min(videos, key=lambda f: (f['height'], self.bitrate(f, duration, 'vbr') or 0))]
+        if not fitting:
+            return None, None
+        # Among equal heights the most efficient codec leaves the most room on the link
+        video = max(fitting, key=lambda f: (f['height'], f.get('fps') or 0, self.EFFICIENCY.get(self.codec(f), -1),
+                                            self.bitrate(f, duration, 'vbr') or 0))
+        kbps = f"{estimate * 8 / 1000:.0f} kbit/s" if estimate else "no history"
+        print(f"Selected {video.get('format_id')} ({video['height']}p {self.codec(video)}) + {audio.get('format_id')} "
+              f"for link estimate {kbps}, surface {surface or 'unknown'}")
+        return video, audio
+
+    def ladder(self, info, video, audio, surface=None):
+        """Representations for an adaptive manifest around the selected pair, or None if the ranges are missing"""
+        if not (video and audio and DashManifest.usable(video) and DashManifest.usable(audio)):
+            return None
+        # VLC only switches between representations of the same codec
+        family = video.get('vcodec', '').split('.')[0]
+        candidates = [f for f in self.video_candidates(info) if self.decodable(f)]
+        max_height = max(self.height_cap(candidates, surface, self.default_max_height), video['height'])
+        duration = info.get('duration')
+        rate = lambda f: self.bitrate(f, duration, 'vbr') or 0
+        # One representation per height/fps, ranked like select(); the selected one always stays in
+        selected = (video['height'], video.get('fps'))
+        videos = {selected: video}
+        for fmt in candidates:
+            key = (fmt['height'], fmt.get('fps'))
+            if (key == selected or not DashManifest.usable(fmt) or fmt.get('vcodec', '').split('.')[0] != family
+                    or fmt['height'] > max_height):
+                continue
+            if key not in videos or rate(fmt) > rate(videos[key]):
+                videos[key] = fmt
+        return list(videos.values()), audio
@@ -0,0 +1,137 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+import threading
+import hashlib
+import requests
+import os
+
+class ImageJob(QRunnable):
+    def __init__(self, loader, url):
+        super().__init__()
+        self.loader = loader
+        self.url = url
+
+    def run(self):
+        self.loader.load(self.url)
+
+class ImageLoader(QObject):
+    """Fetches small images (comment avatars) on a bounded pool with a disk and decoded in-memory LRU"""
+    image_ready = pyqtSignal(str, QImage)  # url, decoded image (emitted from pool threads, queued to receivers)
+
+    def __init__(self, cache_dir=None, size=40, max_workers=4, max_memory=256,
+                 max_disk_bytes=32 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.max_memory = max_memory
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.memory = OrderedDict()  # url -> QImage already scaled to size
+        self.failed = set()  # urls not worth retrying this session
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.writes = 0
+        # One pooled session so every avatar from the same CDN host reuses its connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=max_workers))
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+
+    def get(self, url):
+        """Return the cached image or None, in which case image_ready fires once it has loaded"""
+        if not url:
+            return None
+        with self.lock:
+            image = self.memory.get(url)
+            if image is not None:
+                self.memory.move_to_end(url)
+                return image
+            if url in self.failed or url in self.pending:
+                return None
+            self.pending.add(url)
+        self.pool.start(ImageJob(self, url))
+        return None
+
+    def clear_pending(self):
+        """Drop queued loads nobody is waiting for any more"""
+        self.pool.clear()
+        with self.lock:
+            self.pending.clear()
+
+    def load(self, url):
+        # Pool thread: QImage (unlike QPixmap) is safe to decode and scale here
+        try:
+            data = self.read_disk(url)
+            if data is None:
+                response = self.session.get(url, timeout=5)
+                response.raise_for_status()
+                data = response.content
+                self.write_disk(url, data)
+            image = QImage.fromData(data)
+            if image.isNull():
+                raise ValueError("undecodable image")
+            image = image.scaled(self.size, self.size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+            with self.lock:
+                self.pending.discard(url)
+                self.memory[url] = image
+                while len(self.memory) > self.max_memory:
+                    self.memory.popitem(last=False)
+            self.image_ready.emit(url, image)
+        except Exception as e:
+            print(f"Error fetching image: {e}")
+            with self.lock:
+                self.pending.discard(url)
+                self.failed.add(url)
+
+    def disk_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def read_disk(self, url):
+        if not self.cache_dir:
+            return None
+        path = self.disk_path(url)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mtime is the disk LRU clock
+            return data
+        except OSError:
+            return None
+
+    def write_disk(self, url, data):
+        if not self.cache_dir:
+            return
+        try:
+            with open(self.disk_path(url), 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Image cache write error: {e}")
+            return
+        with self.lock:
+            self.writes += 1
+            trim = self.writes % 50 == 0
+        if trim:
+            self.trim_disk()
+
+    def trim_disk(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
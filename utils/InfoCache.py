@@ -0,0 +1,143 @@
+from collections import OrderedDict
+import threading
+import json
+import time
+import os
+import re
+try:
+    import zstandard
+except ImportError:  # disk tier is optional
+    zstandard = None
+
+# googlevideo puts the expiry in the query (expire=) or in the path for HLS manifests (/expire/)
+EXPIRE_PATTERN = re.compile(r'[?&/]expire[=/](\d+)')
+
+class InfoCache:
+    """Size-bounded LRU of resolved info dicts keyed by video ID, with an optional zstd disk tier"""
+    # Huge fields playback never reads, not worth compressing to disk
+    DISK_SKIP_KEYS = ('automatic_captions', 'subtitles', 'heatmap')
+
+    def __init__(self, max_entries=32, disk_dir=None, max_disk_bytes=64 * 1024 * 1024,
+                 expiry_margin=300, default_ttl=1800):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.expiry_margin = expiry_margin  # stop handing out URLs this long before they die
+        self.default_ttl = default_ttl  # used when no URL carries an expire timestamp
+        self.entries = OrderedDict()  # video_id -> (expires_at, info)
+        self.lock = threading.Lock()
+        self.disk_dir = disk_dir if zstandard else None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def stream_expiry(info):
+        """Earliest expire= timestamp across every stream URL in the info dict"""
+        urls = [info.get('url')]
+        urls += [f.get('url') for f in info.get('requested_formats') or []]
+        urls += [f.get('url') for f in info.get('formats') or []]
+        stamps = [int(m.group(1)) for m in (EXPIRE_PATTERN.search(u) for u in urls if u) if m]
+        return min(stamps) if stamps else None
+
+    @staticmethod
+    def is_cacheable(info):
+        # Live manifests move on constantly, never reuse them
+        return bool(info) and not info.get('is_live') and info.get('live_status') not in ('is_live', 'is_upcoming', 'post_live')
+
+    def get(self, video_id, memory_only=False):
+        """Return a still-valid info dict or None"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(video_id)
+            if entry:
+                if entry[0] > now:
+                    self.entries.move_to_end(video_id)
+                    return entry[1]
+                del self.entries[video_id]
+        if memory_only or not self.disk_dir:
+            return None
+        entry = self.read_disk(video_id)
+        if not entry or entry[0] <= now:
+            return None
+        with self.lock:
+            self.remember(video_id, entry)
+        return entry[1]
+
+    def put(self, video_id, info):
+        if not self.is_cacheable(info):
+            return
+        expire = self.stream_expiry(info)
+        expires_at = expire - self.expiry_margin if expire else time.time() + self.default_ttl
+        if expires_at <= time.time():
+            return
+        with self.lock:
+            self.remember(video_id, (expires_at, info))
+        if self.disk_dir:
+            self.write_disk(video_id, expires_at, info)
+
+    def invalidate(self, video_id):
+        with self.lock:
+            self.entries.pop(video_id, None)
+        if self.disk_dir:
+            try:
+                os.remove(self.disk_path(video_id))
+            except OSError:
+                pass
+
+    def remember(self, video_id, entry):
+        # Caller holds the lock
+        self.entries[video_id] = entry
+        self.entries.move_to_end(video_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def disk_path(self, video_id):
+        return os.path.join(self.disk_dir, f"{video_id}.json.zst")
+
+    def read_disk(self, video_id):
+        path = self.disk_path(video_id)
+        try:
+            with open(path, 'rb') as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            os.utime(path)  # mtime doubles as the disk LRU clock
+            return data['expires_at'], data['info']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Info cache read error: {e}")
+            return None
+
+    def write_disk(self, video_id, expires_at, info):
+        import yt_dlp  # already loaded by the resolver worker calling this
+        try:
+            info = {k: v for k, v in info.items() if not k.startswith('__') and k not in self.DISK_SKIP_KEYS}
+            payload = json.dumps({'expires_at': expires_at, 'info': yt_dlp.YoutubeDL.sanitize_info(info)})
+            tmp_path = self.disk_path(video_id) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(zstandard.ZstdCompressor(level=3).compress(payload.encode('utf-8')))
+            os.replace(tmp_path, self.disk_path(video_id))
+            self.trim_disk()
+        except Exception as e:
+            print(f"Info cache write error: {e}")
+
+    def trim_disk(self):
+        now = time.time()
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.json.zst'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            # Oldest first; anything untouched for a day has certainly expired too
+            if total <= self.max_disk_bytes and now - mtime < 86400:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
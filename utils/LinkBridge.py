@@ -0,0 +1,98 @@
+from PyQt5.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+# Runs in the isolated application world so YouTube's own scripts never see it
+LINK_WATCHER_JS = """
+(function () {
+    if (window.__typLinkBridge) return;
+    window.__typLinkBridge = true;
+    new QWebChannel(qt.webChannelTransport, function (channel) {
+        var bridge = channel.objects.linkBridge;
+        var hoverTimer = null;
+        var scrollTimer = null;
+
+        function videoId(link) {
+            var match = /[?&]v=([\\w-]{11})/.exec(link.href || '');
+            return match ? match[1] : null;
+        }
+
+        // Only report a hover once the pointer rests on a link, not while sweeping across the grid
+        document.addEventListener('mouseover', function (e) {
+            var link = e.target.closest && e.target.closest('a[href*="/watch?v="]');
+            clearTimeout(hoverTimer);
+            if (!link) return;
+            var id = videoId(link);
+            if (id) hoverTimer = setTimeout(function () { bridge.linkHovered(id); }, 150);
+        }, true);
+
+        function reportVisible() {
+            var ids = [];
+            var links = document.querySelectorAll('a[href*="/watch?v="]');
+            for (var i = 0; i < links.length && ids.length < 12; i++) {
+                var rect = links[i].getBoundingClientRect();
+                if (!rect.width || rect.bottom < 0 || rect.top > window.innerHeight) continue;
+                var id = videoId(links[i]);
+                if (id && ids.indexOf(id) < 0) ids.push(id);
+            }
+            if (ids.length) bridge.linksVisible(ids);
+        }
+
+        function scheduleVisible() {
+            clearTimeout(scrollTimer);
+            scrollTimer = setTimeout(reportVisible, 400);
+        }
+        // Middle click queues the video to play after the current one
+        document.addEventListener('auxclick', function (e) {
+            if (e.button !== 1) return;
+            var link = e.target.closest && e.target.closest('a[href*="/watch?v="]');
+            var id = link && videoId(link);
+            if (!id) return;
+            e.preventDefault();
+            bridge.linkQueued(id);
+        }, true);
+
+        window.addEventListener('scroll', scheduleVisible, {passive: true});
+        window.addEventListener('yt-navigate-finish', scheduleVisible);
+        setTimeout(reportVisible, 1500);
+    });
+})();
+"""
+
+class LinkBridge(QObject):
+    """QWebChannel object the page calls with the watch links under the pointer or on screen"""
+    hovered = pyqtSignal(str)  # video id
+    visible = pyqtSignal(list)  # video ids, top of the page first
+    queued = pyqtSignal(str)  # video id the user asked to play next
+
+    def install(self, page):
+        self.channel = QWebChannel(page)
+        self.channel.registerObject('linkBridge', self)
+        page.setWebChannel(self.channel, QWebEngineScript.ApplicationWorld)
+
+        qwebchannel_js = QFile(':/qtwebchannel/qwebchannel.js')
+        if not qwebchannel_js.open(QIODevice.ReadOnly):
+            print("qwebchannel.js not found, link prefetching disabled")
+            return
+        source = bytes(qwebchannel_js.readAll()).decode('utf-8')
+        qwebchannel_js.close()
+
+        script = QWebEngineScript()
+        script.setName('typ-link-bridge')
+        script.setSourceCode(source + LINK_WATCHER_JS)
+        script.setInjectionPoint(QWebEngineScript.DocumentReady)
+        script.setWorldId(QWebEngineScript.ApplicationWorld)
+        script.setRunsOnSubFrames(False)
+        page.scripts().insert(script)
+
+    @pyqtSlot(str)
+    def linkHovered(self, video_id):
+        self.hovered.emit(video_id)
+
+    @pyqtSlot('QVariantList')
+    def linksVisible(self, video_ids):
+        self.visible.emit([str(v) for v in video_ids])
+
+    @pyqtSlot(str)
+    def linkQueued(self, video_id):
+        self.queued.emit(video_id)
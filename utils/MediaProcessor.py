@@ -0,0 +1,164 @@
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+import itertools
+import heapq
+import os
+import re
+
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+class MediaProcessor(QObject):
+    """Runs ffmpeg jobs (audio extraction, remux, re-encode) on a pool of processes, one per core
+
+    Downloads hand their finished files here instead of running ffmpeg on the download thread,
+    so a backlog of conversions uses every core. Lower priority numbers start first; a remux
+    the container refuses is queued again as a re-encode.
+    """
+    task_progress = pyqtSignal(int, float)  # task id, fraction
+    task_finished = pyqtSignal(int, str)  # task id, output path
+    task_failed = pyqtSignal(int, str)  # task id, error
+
+    def __init__(self, ffmpeg_path, max_processes=None, parent=None):
+        super().__init__(parent)
+        self.ffmpeg_path = ffmpeg_path
+        self.max_processes = max_processes or os.cpu_count() or 2
+        self.task_ids = itertools.count(1)
+        self.pending = []  # heap of (priority, task id, task)
+        self.running = {}  # task id -> (QProcess, task)
+
+    def submit(self, source, mode, target_ext, priority=0, output_dir=None, keep_source=False):
+        """Queue a job on a finished file and return its task id
+
+        mode is 'audio' (MP3 at 320k), 'remux' (stream copy) or 'encode'. The output goes next to
+        the source unless output_dir is given; the source is removed once the output is complete,
+        unless keep_source.
+        """
+        task_id = next(self.task_ids)
+        task = {'source': source, 'mode': mode, 'ext': target_ext, 'priority': priority,
+                'output_dir': output_dir, 'keep_source': keep_source,
+                'duration': 0.0, 'output': b'', 'log': b'', 'cancelled': False}
+        heapq.heappush(self.pending, (priority, task_id, task))
+        # Started from the event loop: the caller has the id before any signal for it, and a
+        # batch submitted in one go is started in priority order
+        QTimer.singleShot(0, self.start_next)
+        return task_id
+
+    def active(self):
+        return len(self.pending) + len(self.running)
+
+    def cancel(self, task_id):
+        for i, (_, pending_id, _) in enumerate(self.pending):
+            if pending_id == task_id:
+                self.pending.pop(i)
+                heapq.heapify(self.pending)
+                self.task_failed.emit(task_id, "Cancelled")
+                return
+        if task_id in self.running:
+            process, task = self.running[task_id]
+            task['cancelled'] = True
+            process.kill()  # on_finished cleans up the partial output
+
+    def shutdown(self):
+        """Drop queued jobs and kill the running ones, for app exit"""
+        self.pending = []
+        for task_id in list(self.running):
+            process, task = self.running[task_id]
+            task['cancelled'] = True
+            process.kill()
+            process.waitForFinished(2000)
+
+    def output_path(self, task, suffix=''):
+        base = os.path.splitext(task['source'])[0]
+        if task['output_dir']:
+            base = os.path.join(task['output_dir'], os.path.basename(base))
+        return base + suffix + '.' + task['ext']
+
+    def arguments(self, task, partial):
+        args = ['-hide_banner', '-nostdin', '-y', '-i', task['source']]
+        if task['mode'] == 'audio':
+            # LAME is single-threaded, the pool is what spreads files over the cores
+            args += ['-vn', '-c:a', 'libmp3lame', '-b:a', '320k']
+        elif task['mode'] == 'remux':
+            args += ['-map', '0', '-c', 'copy']
+        else:
+            args += ['-c:v', 'libx264', '-preset', 'medium', '-crf', '20', '-c:a', 'aac', '-b:a', '192k']
+        return args + ['-progress', 'pipe:1', '-nostats', partial]
+
+    def start_next(self):
+        while self.pending and len(self.running) < self.max_processes:
+            _, task_id, task = heapq.heappop(self.pending)
+            if not os.path.exists(task['source']):
+                self.task_failed.emit(task_id, f"Missing file: {task['source']}")
+                continue
+            # Written under a temporary name (the last extension still picks the muxer)
+            task['partial'] = self.output_path(task, '.part')
+            process = QProcess(self)
+            process.readyReadStandardOutput.connect(lambda t=task_id: self.on_output(t))
+            process.readyReadStandardError.connect(lambda t=task_id: self.on_log(t))
+            process.finished.connect(lambda code, status, t=task_id: self.on_finished(t, code, status))
+            process.errorOccurred.connect(lambda error, t=task_id: self.on_error(t, error))
+            self.running[task_id] = (process, task)
+            print(f"Processing {os.path.basename(task['source'])} ({task['mode']} to {task['ext']}, "
+                  f"{len(self.running)} running, {len(self.pending)} queued)")
+            process.start(self.ffmpeg_path, self.arguments(task, task['partial']))
+
+    def on_log(self, task_id):
+        process, task = self.running[task_id]
+        task['log'] = (task['log'] + bytes(process.readAllStandardError()))[-8192:]
+        if not task['duration']:
+            match = DURATION_PATTERN.search(task['log'].decode('utf-8', 'replace'))
+            if match:
+                hours, minutes, seconds = match.groups()
+                task['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def on_output(self, task_id):
+        # -progress writes key=value blocks; out_time_us (out_time_ms in older builds, also in us)
+        process, task = self.running[task_id]
+        lines = (task['output'] + bytes(process.readAllStandardOutput())).split(b'\n')
+        task['output'] = lines.pop()
+        position = None
+        for line in lines:
+            key, _, value = line.decode('utf-8', 'replace').strip().partition('=')
+            if key in ('out_time_us', 'out_time_ms') and value.isdigit():
+                position = int(value) / 1e6
+        if position is not None and task['duration']:
+            self.task_progress.emit(task_id, min(1.0, position / task['duration']))
+
+    def on_error(self, task_id, error):
+        # finished never comes for a process that didn't start
+        if error == QProcess.FailedToStart and task_id in self.running:
+            process, _ = self.running.pop(task_id)
+            process.deleteLater()
+            self.task_failed.emit(task_id, f"Could not start {self.ffmpeg_path}")
+            self.start_next()
+
+    def on_finished(self, task_id, exit_code, exit_status):
+        process, task = self.running.pop(task_id)
+        process.deleteLater()
+        if exit_code == 0 and exit_status == QProcess.NormalExit and not task['cancelled']:
+            output = self.output_path(task)
+            try:
+                os.replace(task['partial'], output)
+                if output != task['source'] and not task['keep_source']:
+                    os.remove(task['source'])
+            except OSError as e:
+                # Locked by a player or removed meanwhile; the pool slot is freed either way
+                self.task_failed.emit(task_id, f"Could not move {os.path.basename(output)} into place: {e}")
+            else:
+                self.task_progress.emit(task_id, 1.0)
+                self.task_finished.emit(task_id, output)
+        else:
+            try:
+                os.remove(task['partial'])
+            except OSError:
+                pass
+            if task['cancelled']:
+                self.task_failed.emit(task_id, "Cancelled")
+            elif task['mode'] == 'remux':
+                # The codecs can't go in this container as they are, same task id re-encodes
+                print(f"Remux of {os.path.basename(task['source'])} failed, re-encoding")
+                task.update(mode='encode', duration=0.0, output=b'', log=b'')
+                heapq.heappush(self.pending, (task['priority'], task_id, task))
+            else:
+                error = task['log'].decode('utf-8', 'replace').strip().splitlines()
+                self.task_failed.emit(task_id, error[-1] if error else f"ffmpeg exited with {exit_code}")
+        self.start_next()
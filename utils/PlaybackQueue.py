@@ -0,0 +1,99 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+class PlaylistWorker(QThread):
+    """Lists the video IDs of a playlist (flat, no per-video extraction)"""
+    listed = pyqtSignal(str, list)  # playlist id, video ids in order
+
+    def __init__(self, playlist_id, max_entries=200):
+        super().__init__()
+        self.playlist_id = playlist_id
+        self.max_entries = max_entries
+
+    def run(self):
+        try:
+            import yt_dlp
+            opts = {'extract_flat': 'in_playlist', 'quiet': True, 'skip_download': True,
+                    'playlistend': self.max_entries}
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(f'https://www.youtube.com/playlist?list={self.playlist_id}', download=False)
+            video_ids = [entry['id'] for entry in info.get('entries') or [] if entry and entry.get('id')]
+            self.listed.emit(self.playlist_id, video_ids)
+        except Exception as e:
+            print(f"Playlist listing error: {e}")
+
+class PlaybackQueue(QObject):
+    """What plays after the current video: user-queued videos first, then the rest of the playlist"""
+    changed = pyqtSignal()  # the next video may be a different one now
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queued = []  # video ids added by the user, played in order
+        self.playlist_id = None
+        self.playlist = []  # video ids of the playlist being played through
+        self.position = None  # index of the last playlist entry played; queued videos don't move it
+        self.anchor = None  # video the playlist was entered with, placed once the listing arrives
+        self.current = None
+        self.workers = []
+
+    def start(self, video_id, playlist_id=None):
+        """A video was picked on the page; playlist_id is its list= parameter, if any"""
+        self.current = video_id
+        if video_id in self.queued:
+            self.queued.remove(video_id)
+        if playlist_id != self.playlist_id:
+            self.playlist_id = playlist_id
+            self.playlist = []
+            self.position = None
+            self.anchor = video_id
+            if playlist_id:
+                worker = PlaylistWorker(playlist_id)
+                worker.listed.connect(self.on_listed)
+                worker.finished.connect(lambda w=worker: self.workers.remove(w))
+                self.workers.append(worker)  # a collected running QThread takes the app down
+                worker.start(QThread.LowPriority)
+        elif video_id in self.playlist:
+            self.position = self.playlist.index(video_id)  # picked another entry on the page
+        self.changed.emit()
+
+    def on_listed(self, playlist_id, video_ids):
+        if playlist_id != self.playlist_id:
+            return  # the user left that playlist meanwhile
+        print(f"Playlist {playlist_id}: {len(video_ids)} videos")
+        self.playlist = video_ids
+        if self.anchor in video_ids:
+            self.position = video_ids.index(self.anchor)
+        self.changed.emit()
+
+    def add(self, video_id):
+        if video_id == self.current or video_id in self.queued:
+            return
+        print(f"Queued: {video_id}")
+        self.queued.append(video_id)
+        self.changed.emit()
+
+    def peek(self):
+        """Video id that plays next, or None"""
+        if self.queued:
+            return self.queued[0]
+        if self.position is not None and self.position + 1 < len(self.playlist):
+            return self.playlist[self.position + 1]
+        return None
+
+    def advance(self):
+        """Move on to the next video and return its id"""
+        video_id = self.peek()
+        if self.queued:
+            self.queued.pop(0)
+        elif video_id:
+            self.position += 1  # only playlist entries move through the playlist
+        if video_id:
+            self.current = video_id
+            self.changed.emit()
+        return video_id
+
+    def clear(self):
+        self.current = None
+        self.playlist_id = None
+        self.playlist = []
+        self.position = None
+        self.anchor = None
@@ -0,0 +1,116 @@
+from contextlib import contextmanager, nullcontext
+from collections import deque
+import threading
+import json
+import time
+import os
+
+NULL_SPAN = nullcontext()
+
+class PlaybackTracer:
+    """Per-stage spans from click to first frame, exported as Chrome-trace JSON (python run.py --trace-playback)
+
+    Load the file in chrome://tracing or ui.perfetto.dev. Disabled, every call is a flag check.
+    """
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.path = None
+        self.start = time.perf_counter()
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.lock = threading.Lock()
+        self.session = 0  # one per click, ties the async click -> first frame span together
+        self.video_id = None
+        self.session_started = None
+        self.first_frame_seen = True
+        self.stages = []  # summary of the current session: span durations and @offsets of instants
+
+    def enable(self, path='playback_trace.json'):
+        self.enabled = True
+        self.path = path
+        self.start = time.perf_counter()
+
+    def now_us(self):
+        return (time.perf_counter() - self.start) * 1e6
+
+    def record(self, event):
+        thread = threading.current_thread()
+        event['pid'] = os.getpid()
+        event['tid'] = thread.ident
+        with self.lock:
+            if thread.ident not in self.thread_names:
+                # VLC's own threads show up as Dummy-N, good enough to tell them apart
+                self.thread_names[thread.ident] = thread.name
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': event['pid'],
+                                    'tid': thread.ident, 'args': {'name': thread.name}})
+            self.events.append(event)
+
+    def begin_session(self, video_id):
+        """A click: closes any unfinished session and opens the click -> first frame span"""
+        if not self.enabled:
+            return
+        if not self.first_frame_seen:
+            self.end_session('abandoned')
+        self.session += 1
+        self.video_id = video_id
+        self.session_started = time.perf_counter()
+        self.first_frame_seen = False
+        self.stages = []
+        self.record({'name': 'click -> first frame', 'cat': 'playback', 'ph': 'b', 'id': self.session,
+                     'ts': self.now_us(), 'args': {'video_id': video_id}})
+
+    def end_session(self, outcome='first frame'):
+        if not self.enabled or self.first_frame_seen:
+            return
+        self.first_frame_seen = True
+        total = (time.perf_counter() - self.session_started) * 1000
+        self.record({'name': 'click -> first frame', 'cat': 'playback', 'ph': 'e', 'id': self.session,
+                     'ts': self.now_us(), 'args': {'outcome': outcome}})
+        print(f"[trace] {self.video_id}: {outcome} after {total:.0f} ms - {', '.join(self.stages)}")
+
+    def first_frame(self):
+        # Called from the first position update of a session, on VLC's event thread
+        if self.enabled and not self.first_frame_seen:
+            self.instant('first position update')
+            self.end_session()
+
+    def span(self, name, video_id=None, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return self.timed(name, video_id or self.video_id, args)
+
+    @contextmanager
+    def timed(self, name, video_id, args):
+        started = self.now_us()
+        try:
+            yield
+        finally:
+            duration = self.now_us() - started
+            args['video_id'] = video_id
+            self.record({'name': name, 'cat': 'playback', 'ph': 'X', 'ts': started, 'dur': duration, 'args': args})
+            if video_id == self.video_id and not self.first_frame_seen:
+                self.stages.append(f"{name} {duration / 1000:.0f} ms")
+
+    def instant(self, name, video_id=None, **args):
+        if not self.enabled:
+            return
+        args['video_id'] = video_id or self.video_id
+        self.record({'name': name, 'cat': 'playback', 'ph': 'i', 's': 't', 'ts': self.now_us(), 'args': args})
+        if args['video_id'] == self.video_id and not self.first_frame_seen:
+            self.stages.append(f"{name} @{(time.perf_counter() - self.session_started) * 1000:.0f}")
+
+    def export(self, path=None):
+        path = path or self.path
+        if not self.enabled or not path:
+            return
+        with self.lock:
+            events = list(self.events)
+        try:
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            print(f"Playback trace written to {os.path.abspath(path)}")
+        except OSError as e:
+            print(f"Trace export error: {e}")
+
+tracer = PlaybackTracer()
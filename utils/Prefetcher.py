@@ -0,0 +1,140 @@
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from collections import deque
+from utils.ResolveWorker import ResolveWorker
+import time
+
+class Prefetcher(QObject):
+    """Low priority, bounded queue that resolves hovered/visible videos into the info cache ahead of a click"""
+    prefetched = pyqtSignal(str, object)  # video id, info dict (None when it failed or was cancelled)
+
+    def __init__(self, ydl_opts, cache, max_workers=1, max_queue=8, max_per_minute=12, retry_after=600,
+                 worker_class=ResolveWorker, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.max_queue = max_queue
+        self.max_per_minute = max_per_minute  # hard cap on extraction volume
+        self.retry_after = retry_after  # don't re-hint the same video within this many seconds
+        self.queue = deque()
+        self.attempted = {}  # video_id -> time it was last dispatched
+        self.dispatch_times = deque()
+        self.paused = False
+        self.forced = set()  # preloaded ids, dispatched even while paused
+        self.next_request_id = 0
+        self.in_flight = {}  # worker -> (request_id, video_id)
+        self.workers = []
+        for _ in range(max_workers):
+            worker = worker_class(ydl_opts, cache)
+            worker.resolved.connect(lambda request_id, video_id, info, w=worker: self.on_worker_done(w, request_id, video_id, info))
+            worker.failed.connect(lambda request_id, video_id, error, w=worker: self.on_worker_done(w, request_id, video_id, None))
+            worker.cancelled.connect(lambda request_id, video_id, w=worker: self.on_worker_cancelled(w, request_id, video_id))
+            worker.start(QThread.LowestPriority)
+            self.workers.append(worker)
+        self.rate_timer = QTimer(self)
+        self.rate_timer.setSingleShot(True)
+        self.rate_timer.timeout.connect(self.dispatch)
+
+    def hint(self, video_id, urgent=False):
+        """Queue a video; urgent (hovered) hints jump ahead of scrolled-past ones"""
+        if self.paused or not self.wanted(video_id):
+            return
+        if urgent:
+            if video_id in self.queue:
+                self.queue.remove(video_id)
+            self.queue.appendleft(video_id)
+            while len(self.queue) > self.max_queue:
+                self.queue.pop()
+        elif video_id not in self.queue and len(self.queue) < self.max_queue:
+            self.queue.append(video_id)
+        self.dispatch()
+
+    def preload(self, video_id):
+        """Resolve the video queued to play next, even while paused for playback"""
+        if not self.wanted(video_id):
+            return
+        if video_id in self.queue:
+            self.queue.remove(video_id)
+        self.queue.appendleft(video_id)
+        # Stays forced until dispatched, a busy worker or the rate limit may hold it back
+        self.forced.add(video_id)
+        self.dispatch()
+
+    def hint_many(self, video_ids):
+        for video_id in video_ids:
+            self.hint(video_id)
+
+    def wanted(self, video_id):
+        if self.is_in_flight(video_id) or self.cache.get(video_id, memory_only=True):
+            return False
+        return time.time() - self.attempted.get(video_id, 0) > self.retry_after
+
+    def is_in_flight(self, video_id):
+        return any(vid == video_id for _, vid in self.in_flight.values())
+
+    def pause(self):
+        """Stop starting new work (in-flight requests are left alone)"""
+        self.paused = True
+        self.queue = deque(video_id for video_id in self.queue if video_id in self.forced)
+
+    def resume(self):
+        self.paused = False
+
+    def cancel_except(self, video_id=None):
+        """Abort every in-flight prefetch except video_id, return True if that one is in flight"""
+        adopted = False
+        for worker, (request_id, vid) in list(self.in_flight.items()):
+            if vid == video_id:
+                adopted = True
+                continue
+            self.next_request_id += 1
+            worker.cancel(self.next_request_id)
+        return adopted
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.wait(3000)
+
+    def dispatch(self):
+        if self.paused and not self.forced:
+            return
+        now = time.time()
+        while self.dispatch_times and now - self.dispatch_times[0] > 60:
+            self.dispatch_times.popleft()
+        for worker in self.workers:
+            if worker in self.in_flight:
+                continue
+            video_id = None
+            while self.queue and not video_id:
+                candidate = self.queue.popleft()
+                if self.paused and candidate not in self.forced:
+                    continue
+                if self.wanted(candidate):
+                    video_id = candidate
+                else:
+                    self.forced.discard(candidate)
+            if not video_id:
+                return
+            if len(self.dispatch_times) >= self.max_per_minute:
+                # Over budget - put it back and try again once the oldest dispatch ages out
+                self.queue.appendleft(video_id)
+                self.rate_timer.start(int((60 - (now - self.dispatch_times[0])) * 1000) + 50)
+                return
+            self.next_request_id += 1
+            self.forced.discard(video_id)
+            self.in_flight[worker] = (self.next_request_id, video_id)
+            self.attempted[video_id] = now
+            self.dispatch_times.append(now)
+            print(f"Prefetching video info for: {video_id}")
+            worker.submit(self.next_request_id, video_id)
+
+    def on_worker_cancelled(self, worker, request_id, video_id):
+        self.attempted.pop(video_id, None)  # cut short, so it may be hinted again
+        self.on_worker_done(worker, request_id, video_id, None)
+
+    def on_worker_done(self, worker, request_id, video_id, info):
+        if self.in_flight.get(worker) != (request_id, video_id):
+            return
+        del self.in_flight[worker]
+        self.prefetched.emit(video_id, info)
+        self.dispatch()
@@ -0,0 +1,334 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from requests.adapters import HTTPAdapter
+import threading
+import requests
+import hashlib
+import time
+import re
+from utils.ChunkCache import ChunkCache
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # VLC makes a request per seek, nobody wants those in the console
+
+    def do_HEAD(self):
+        self.server.proxy.serve(self, send_body=False)
+
+    def do_GET(self):
+        self.server.proxy.serve(self, send_body=True)
+
+class RangeProxy:
+    """Localhost HTTP proxy VLC reads streams through, answering Range requests from a disk chunk cache
+
+    Misses are fetched upstream one request per run of missing chunks, and a background
+    thread keeps a window ahead of the playhead filled, so seeks back and replays are local.
+    """
+    MAX_RUN = 16  # chunks per upstream request on a miss
+    PREFETCH_AHEAD = 24  # chunks kept ready past the furthest read
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, chunk_size=1024 * 1024, bandwidth_estimator=None):
+        self.cache = ChunkCache(cache_dir, chunk_size, max_bytes)
+        self.chunk_size = chunk_size
+        self.bandwidth_estimator = bandwidth_estimator
+        self.last_sample = 0
+        self.streams = {}  # token -> (key, upstream url)
+        self.documents = {}  # name -> (content type, bytes, origin url), small generated files like manifests
+        self.lock = threading.Lock()
+        self.inflight = {}  # (key, index) -> Event set once the chunk is on disk or given up on
+        self.playheads = {}  # token -> (furthest chunk read, time), drives the prefetcher
+        self.wakeup = threading.Condition(self.lock)
+        self.running = False
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = self.USER_AGENT
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.prefetch_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            self.wakeup.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def stream_key(url, video_id=None):
+        """Stable cache key: signed googlevideo URLs change per resolve, the video/itag/length don't"""
+        query = parse_qs(urlparse(url).query)
+        itag = query.get('itag', [None])[0]
+        clen = query.get('clen', [None])[0]
+        if itag and clen:
+            owner = video_id or query.get('id', [''])[0]
+            return re.sub(r'[^\w-]', '_', f"{owner}-{itag}-{clen}")
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def url_for(self, url, video_id=None):
+        """Local URL to hand VLC instead of the upstream one"""
+        key = self.stream_key(url, video_id)
+        clen = parse_qs(urlparse(url).query).get('clen', [None])[0]
+        if clen and clen.isdigit():
+            self.cache.set_size(key, int(clen))
+        token = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        with self.lock:
+            self.streams[token] = (key, url)
+        return f'{self.base_url}/s/{token}'
+
+    def publish(self, name, text, content_type, origin=None):
+        """Serve a generated document, e.g. a DASH manifest, at a local URL"""
+        with self.lock:
+            self.documents[name] = (content_type, text.encode('utf-8'), origin)
+            while len(self.documents) > 16:
+                self.documents.pop(next(iter(self.documents)))
+        return f'{self.base_url}/m/{name}'
+
+    def upstream_url(self, url):
+        """Where a local URL really comes from; anything else is returned unchanged"""
+        if not url.startswith(self.base_url):
+            return url
+        name = url[len(self.base_url):].split('?', 1)[0]
+        with self.lock:
+            if name.startswith('/s/') and name[3:] in self.streams:
+                return self.streams[name[3:]][1]
+            if name.startswith('/m/') and name[3:] in self.documents:
+                return self.documents[name[3:]][2] or url
+        return url
+
+    # --- serving, on the server's request threads ---
+
+    def serve_document(self, handler, name, send_body):
+        with self.lock:
+            document = self.documents.get(name)
+        if not document:
+            handler.send_error(404)
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', document[0])
+        handler.send_header('Content-Length', str(len(document[1])))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(document[1])
+
+    def serve(self, handler, send_body):
+        if handler.path.startswith('/m/'):
+            self.serve_document(handler, handler.path[3:].split('?', 1)[0], send_body)
+            return
+        token = handler.path.split('?', 1)[0].rsplit('/', 1)[-1]
+        with self.lock:
+            stream = self.streams.get(token)
+        if not stream:
+            handler.send_error(404)
+            return
+        key, url = stream
+        match = re.match(r'bytes=(\d+)-(\d*)', handler.headers.get('Range', ''))
+        start = int(match.group(1)) if match else 0
+        end = int(match.group(2)) if match and match.group(2) else None
+        chunks = self.chunks(token, key, url, start // self.chunk_size)
+        first = None
+        try:
+            if self.cache.size(key) is None:
+                first = next(chunks)  # the first upstream response tells us the total size
+            size = self.cache.size(key)
+            if size is None or start >= size:
+                chunks.close()
+                handler.send_response(416)
+                handler.send_header('Content-Range', f'bytes */{size or 0}')
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+        except (StopIteration, requests.RequestException, IOError) as e:
+            print(f"Stream proxy upstream error: {e}")
+            chunks.close()
+            handler.send_error(502)
+            return
+        end = size - 1 if end is None else min(end, size - 1)
+        handler.send_response(206 if match else 200)
+        if match:
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        handler.send_header('Content-Type', 'application/octet-stream')
+        handler.send_header('Content-Length', str(end - start + 1))
+        handler.send_header('Accept-Ranges', 'bytes')
+        handler.end_headers()
+        if not send_body:
+            chunks.close()
+            return
+        position = (start // self.chunk_size) * self.chunk_size
+        try:
+            while position <= end:
+                data = first if first is not None else next(chunks)
+                first = None
+                lo = max(start - position, 0)
+                hi = min(end - position + 1, len(data))
+                handler.wfile.write(data[lo:hi])
+                position += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # VLC drops the connection on every seek
+        except (StopIteration, requests.RequestException, IOError) as e:
+            print(f"Stream proxy upstream error: {e}")
+            handler.close_connection = True
+        finally:
+            chunks.close()
+
+    def chunks(self, token, key, url, index):
+        """Yield chunks from index on: disk hits directly, misses fetched upstream in runs"""
+        while True:
+            size = self.cache.size(key)
+            if size is not None and index * self.chunk_size >= size:
+                return
+            self.note_playhead(token, index)
+            data = self.cache.get(key, index)
+            if data is not None:
+                yield data
+                index += 1
+                continue
+            event = self.claim(key, index)
+            if event:
+                event.wait(30)  # the prefetcher or another request is fetching it right now
+                continue
+            fetched_from = index
+            for data in self.fetch(key, url, index):
+                yield data
+                index += 1
+                self.note_playhead(token, index - 1)
+            if index == fetched_from:
+                raise IOError(f"Upstream returned no data at chunk {index}")
+
+    def claim(self, key, index):
+        """None if the caller now owns fetching this chunk, otherwise the event to wait on"""
+        with self.lock:
+            event = self.inflight.get((key, index))
+            if event:
+                return event
+            self.inflight[(key, index)] = threading.Event()
+            return None
+
+    def release(self, key, index):
+        with self.lock:
+            event = self.inflight.pop((key, index), None)
+            self.wakeup.notify()  # a chunk given up on may be the prefetcher's next job
+        if event:
+            event.set()
+
+    def fetch(self, key, url, index, measure=False):
+        """One upstream request for index plus the missing, unclaimed chunks right after it (claimed by caller)"""
+        last = index
+        size = self.cache.size(key)
+        max_index = (size - 1) // self.chunk_size if size else index + self.MAX_RUN
+        with self.lock:
+            while (last + 1 <= min(max_index, index + self.MAX_RUN - 1)
+                   and (key, last + 1) not in self.inflight and not self.cache.has(key, last + 1)):
+                last += 1
+                self.inflight[(key, last)] = threading.Event()
+        current = index
+        started = time.time()
+        try:
+            begin = index * self.chunk_size
+            response = self.session.get(url, stream=True, timeout=10,
+                                        headers={'Range': f'bytes={begin}-{(last + 1) * self.chunk_size - 1}'})
+            with response:
+                response.raise_for_status()
+                total = re.search(r'/(\d+)$', response.headers.get('Content-Range', ''))
+                if total:
+                    self.cache.set_size(key, int(total.group(1)))
+                elif response.status_code == 200 and response.headers.get('Content-Length'):
+                    self.cache.set_size(key, int(response.headers['Content-Length']))
+                skip = begin if response.status_code == 200 else 0  # server ignored the Range header
+                buffer = bytearray()
+                for block in response.iter_content(64 * 1024):
+                    if skip:
+                        dropped = min(skip, len(block))
+                        block = block[dropped:]
+                        skip -= dropped
+                    buffer += block
+                    while len(buffer) >= self.chunk_size and current <= last:
+                        data = bytes(buffer[:self.chunk_size])
+                        del buffer[:self.chunk_size]
+                        self.cache.put(key, current, data)
+                        self.release(key, current)
+                        current += 1
+                        yield data
+                    if current > last:
+                        break
+                if buffer and current <= last:
+                    size = self.cache.size(key)
+                    if not size or current != (size - 1) // self.chunk_size:
+                        raise IOError(f"Upstream closed early at chunk {current}")
+                    data = bytes(buffer)  # the stream's short last chunk
+                    self.cache.put(key, current, data)
+                    self.release(key, current)
+                    current += 1
+                    yield data
+            if measure:
+                self.sample_throughput((current - index) * self.chunk_size, time.time() - started)
+        finally:
+            # Anything we claimed but didn't get goes back up for grabs
+            for unfinished in range(current, last + 1):
+                self.release(key, unfinished)
+
+    def sample_throughput(self, size, elapsed):
+        # VLC reads from us now, so the link speed has to be measured here; only read-ahead
+        # fetches count since requests VLC paces would understate it
+        if (self.bandwidth_estimator and size >= 2 * 1024 * 1024 and elapsed > 0.2
+                and time.time() - self.last_sample > 30):
+            self.last_sample = time.time()
+            self.bandwidth_estimator.add_sample(size / elapsed, 'proxy')
+
+    # --- read-ahead ---
+
+    def note_playhead(self, token, index):
+        with self.lock:
+            previous = self.playheads.get(token)  # a seek back moves it back too
+            if previous and previous[0] == index:
+                return
+            self.playheads[token] = (index, time.time())
+            self.wakeup.notify()
+
+    def next_prefetch(self):
+        """(key, url, index) of the first missing chunk ahead of a recently read stream, or None"""
+        now = time.time()
+        for token, (index, seen) in sorted(self.playheads.items(), key=lambda p: p[1][1], reverse=True):
+            if now - seen > 30:
+                del self.playheads[token]  # paused for long or closed, stop spending bandwidth on it
+                continue
+            key, url = self.streams[token]
+            size = self.cache.size(key)
+            if size is None:
+                continue
+            last = min((size - 1) // self.chunk_size, index + self.PREFETCH_AHEAD)
+            for ahead in range(index + 1, last + 1):
+                if (key, ahead) not in self.inflight and not self.cache.has(key, ahead):
+                    self.inflight[(key, ahead)] = threading.Event()
+                    return key, url, ahead
+        return None
+
+    def prefetch_loop(self):
+        while True:
+            with self.lock:
+                job = None
+                while self.running and not job:
+                    job = self.next_prefetch()
+                    if not job:
+                        self.wakeup.wait(5)
+                if not self.running:
+                    return
+            key, url, index = job
+            try:
+                for _ in self.fetch(key, url, index, measure=True):
+                    pass
+            except Exception as e:
+                print(f"Stream proxy prefetch error: {e}")
+                time.sleep(1)
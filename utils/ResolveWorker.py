@@ -0,0 +1,178 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import threading
+import logging
+import time
+from utils.PlaybackTracer import tracer
+
+class CancelAwareLogger:
+    # yt-dlp reports every step of an extraction through the logger, so raising here
+    # is the cleanest way to abort a request that went stale between two HTTP calls
+    def __init__(self, worker):
+        self.worker = worker
+        self.log = logging.getLogger()
+
+    def debug(self, msg):
+        self.worker.raise_if_stale()
+        self.log.debug(msg)
+
+    def info(self, msg):
+        self.worker.raise_if_stale()
+        self.log.info(msg)
+
+    def warning(self, msg):
+        self.log.warning(msg)
+
+    def error(self, msg):
+        self.log.error(msg)
+
+class ResolveWorker(QThread):
+    """Runs yt-dlp extractions off the GUI thread - only the newest request is kept"""
+    resolved = pyqtSignal(int, str, object)  # request id, video id, info dict
+    failed = pyqtSignal(int, str, str)  # request id, video id, error
+    cancelled = pyqtSignal(int, str)  # request id, video id
+
+    def __init__(self, ydl_opts, cache=None, warm=False):
+        super().__init__()
+        self.ydl_opts = dict(ydl_opts, logger=CancelAwareLogger(self))
+        self.cache = cache
+        self.warm = warm  # pre-connect and pre-load the player JS as soon as the thread starts
+        self.ydl = None  # one YoutubeDL for the whole session, created on the worker thread
+        self._cond = threading.Condition()
+        self._pending = None  # (request_id, video_id) waiting to start
+        self._current = None  # request id being extracted right now
+        self._latest = 0  # newest request id the GUI cares about
+        self._running = True
+
+    def submit(self, request_id, video_id):
+        with self._cond:
+            self._latest = request_id
+            dropped, self._pending = self._pending, (request_id, video_id)  # replaces anything not started yet
+            self._cond.notify()
+        if dropped:
+            self.cancelled.emit(*dropped)
+
+    def cancel(self, request_id):
+        """Drop the pending request and abort the running one"""
+        with self._cond:
+            self._latest = request_id
+            dropped, self._pending = self._pending, None
+        # A request the thread never took would otherwise end without any signal
+        if dropped:
+            self.cancelled.emit(*dropped)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._pending = None
+            self._cond.notify()
+
+    def raise_if_stale(self):
+        if self._current is None or QThread.currentThread() is not self:
+            return
+        if not self._running or self._current != self._latest:
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled(f"Request {self._current} superseded")
+
+    def extract(self, video_id):
+        # Reusing the instance keeps its HTTP connections, cookies and the
+        # extractor's player JS / signature caches warm between clicks
+        print(f"Fetching video info for: {video_id}")
+        return self.ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+
+    def warm_up(self):
+        """Pay the first-click costs up front: extractor import, DNS/TLS to youtube.com and the player JS"""
+        from yt_dlp.networking import HEADRequest
+        start = time.time()
+        try:
+            ie = self.ydl.get_info_extractor('Youtube')
+            self.ydl.urlopen(HEADRequest('https://www.youtube.com/')).close()
+            player_url = ie._download_player_url('warmup')
+            if player_url:
+                ie._load_player('warmup', player_url, fatal=False)
+            print(f"Resolver warmed up in {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"Resolver warm-up failed: {e}")
+
+    def defer_comments(self):
+        """Keep what the comment continuation needs on the info dict instead of fetching comments now"""
+        ie = self.ydl.get_info_extractor('Youtube')
+
+        def extract_comments(ytcfg, video_id, contents, webpage):
+            # Called with the watch page data extract_info already downloaded, so CommentFetcher
+            # later only has to request the continuation pages. Plain data only: the fetcher runs
+            # its own YoutubeDL, this one and its extractor are not thread-safe, and the info
+            # cache shouldn't keep them (or the whole page) alive
+            section = [item for item in contents or []
+                       if (item.get('itemSectionRenderer') or {}).get('sectionIdentifier') == 'comment-item-section']
+            continuation = {'ytcfg': ytcfg, 'video_id': video_id, 'contents': section}
+            return lambda: {'__comment_continuation': continuation}
+
+        ie.extract_comments = extract_comments
+
+    def capture_byte_ranges(self):
+        """Copy each adaptive format's init/index byte ranges onto its format dict, a DASH manifest needs them"""
+        ie = self.ydl.get_info_extractor('Youtube')
+        extract_formats = ie._extract_formats_and_subtitles
+
+        def extract_formats_and_subtitles(streaming_data, *args, **kwargs):
+            ranges = {}
+            for data in streaming_data or []:
+                for fmt in (data or {}).get('adaptiveFormats') or []:
+                    init, index = fmt.get('initRange') or {}, fmt.get('indexRange') or {}
+                    if 'end' in init and 'end' in index:
+                        ranges[(str(fmt.get('itag')), str(fmt.get('contentLength')))] = (
+                            f"{init.get('start', 0)}-{init['end']}", f"{index.get('start', 0)}-{index['end']}")
+            for item in extract_formats(streaming_data, *args, **kwargs):
+                if isinstance(item, dict) and item.get('url'):
+                    found = ranges.get((item.get('format_id', '').split('-')[0], str(item.get('filesize'))))
+                    if found:
+                        item['init_range'], item['index_range'] = found
+                yield item
+
+        ie._extract_formats_and_subtitles = extract_formats_and_subtitles
+
+    def run(self):
+        # yt-dlp is imported here, on the worker, so it never weighs on startup
+        import yt_dlp
+        self.ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+        self.defer_comments()
+        self.capture_byte_ranges()
+        if self.warm:
+            self.warm_up()
+        try:
+            self.serve()
+        finally:
+            self.ydl.close()
+
+    def serve(self):
+        from yt_dlp.utils import DownloadCancelled
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                request_id, video_id = self._pending
+                self._pending = None
+                self._current = request_id
+            try:
+                with tracer.span('info cache lookup', video_id):
+                    info = self.cache.get(video_id) if self.cache else None
+                if not info:
+                    with tracer.span('extract_info', video_id):
+                        info = self.extract(video_id)
+                    if info and self.cache:
+                        with tracer.span('info cache store', video_id):
+                            self.cache.put(video_id, info)
+                if not info:
+                    self.failed.emit(request_id, video_id, "Failed to get video info")
+                else:
+                    self.resolved.emit(request_id, video_id, info)
+            except DownloadCancelled:
+                print(f"Cancelled stale resolve for: {video_id}")
+                tracer.instant('resolve cancelled', video_id)
+                self.cancelled.emit(request_id, video_id)
+            except Exception as e:
+                self.failed.emit(request_id, video_id, str(e))
+            finally:
+                self._current = None
@@ -0,0 +1,217 @@
+from requests.adapters import HTTPAdapter
+import threading
+import requests
+import json
+import time
+import os
+
+class SegmentedFetcher:
+    """Downloads one HTTP file as parallel byte ranges into a preallocated .part file
+
+    googlevideo throttles each connection, not the client, so a few ranges in flight fill the
+    link. A journal next to the .part file lists the finished chunks; after a crash or a
+    cancelled run only the missing ranges are fetched again. Blocks the playback proxy already
+    holds in its ChunkCache are copied from disk instead of downloaded.
+    """
+
+    def __init__(self, url, path, size=None, headers=None, connections=4, chunk_size=8 * 1024 * 1024,
+                 progress_hook=None, retries=3, cache=None, cache_key=None):
+        self.url = url
+        self.path = path
+        self.size = size
+        self.connections = connections
+        self.cache = cache if cache_key else None
+        self.cache_key = cache_key
+        if self.cache:
+            # Whole cache blocks per chunk, so a block never straddles two chunks
+            chunk_size = max(1, chunk_size // self.cache.chunk_size) * self.cache.chunk_size
+        self.chunk_size = chunk_size
+        self.progress_hook = progress_hook  # called with yt-dlp style progress dicts
+        self.retries = retries
+        self.part_path = path + '.part'
+        self.journal_path = path + '.part.chunks'
+        self.lock = threading.Lock()
+        self.done = set()
+        self.todo = []
+        self.downloaded = 0  # from the network in this run
+        self.reused = 0  # copied from the playback cache
+        self.error = None
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=connections))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=connections))
+        if headers:
+            self.session.headers.update(headers)
+
+    def probe_size(self):
+        """Total size from a one-byte range request, or None if the server doesn't do ranges"""
+        try:
+            response = self.session.get(self.url, headers={'Range': 'bytes=0-0'}, timeout=15)
+            content_range = response.headers.get('Content-Range', '')
+            response.close()
+            if response.status_code == 206 and '/' in content_range:
+                return int(content_range.rsplit('/', 1)[1])
+        except (requests.RequestException, ValueError) as e:
+            print(f"Range probe failed: {e}")
+        return None
+
+    def chunk_count(self):
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def load_journal(self):
+        # A journal for another size or chunking belongs to a different stream, start over
+        if not os.path.exists(self.part_path):
+            return set()
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            if journal.get('size') == self.size and journal.get('chunk_size') == self.chunk_size:
+                return set(journal.get('done', []))
+        except (OSError, ValueError):
+            pass
+        return set()
+
+    def save_journal(self):
+        tmp_path = self.journal_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': self.size, 'chunk_size': self.chunk_size, 'done': sorted(self.done)}, f)
+        os.replace(tmp_path, self.journal_path)
+
+    def report(self, status, started):
+        if not self.progress_hook:
+            return
+        elapsed = time.time() - started
+        with self.lock:
+            downloaded = self.downloaded
+        speed = downloaded / elapsed if elapsed > 0 else None
+        remaining = self.size - sum(self.chunk_length(i) for i in self.done)
+        self.progress_hook({
+            'status': status, 'filename': self.path, 'total_bytes': self.size,
+            'downloaded_bytes': self.size - remaining, 'elapsed': elapsed, 'speed': speed,
+            'eta': int(remaining / speed) if speed else None,
+            # Only what came over the network in this run; resumed and cache-copied bytes took no time
+            'fetched_bytes': downloaded,
+        })
+
+    def fetch(self):
+        """Download to self.path; True on success, False if the server can't serve ranges"""
+        if self.size is None:
+            self.size = self.probe_size()
+        if not self.size:
+            return False
+        self.done = self.load_journal()
+        if self.done:
+            print(f"Resuming {os.path.basename(self.path)}: {len(self.done)}/{self.chunk_count()} chunks on disk")
+        else:
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.size)  # preallocated, every range writes in place
+            self.save_journal()
+        self.todo = [i for i in range(self.chunk_count()) if i not in self.done]
+        started = time.time()
+        workers = [threading.Thread(target=self.worker, args=(started,), daemon=True)
+                   for _ in range(min(self.connections, len(self.todo)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if self.error:
+            raise IOError(f"Segmented download failed: {self.error}")
+        if self.reused:
+            print(f"{os.path.basename(self.path)}: {self.reused / 1e6:.1f} MB reused from the playback cache, "
+                  f"{self.downloaded / 1e6:.1f} MB downloaded")
+        os.replace(self.part_path, self.path)
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+        self.report('finished', started)
+        return True
+
+    def worker(self, started):
+        with open(self.part_path, 'r+b') as f:
+            while True:
+                with self.lock:
+                    if self.error or not self.todo:
+                        return
+                    index = self.todo.pop(0)
+                for attempt in range(self.retries):
+                    try:
+                        self.fetch_chunk(f, index, started)
+                        break
+                    except (requests.RequestException, IOError) as e:
+                        if attempt == self.retries - 1:
+                            with self.lock:
+                                self.error = self.error or str(e)
+                            return
+                        time.sleep(1 + attempt)
+                    except Exception as e:
+                        # Raised by the progress hook (a cancelled download), not worth a retry
+                        with self.lock:
+                            self.error = self.error or str(e)
+                        return
+
+    def pieces(self, offset, length):
+        """(offset, length, cached bytes or None) covering a chunk, missing cache blocks merged into runs"""
+        if not self.cache:
+            yield offset, length, None
+            return
+        block = self.cache.chunk_size
+        end = offset + length
+        run_start = None
+        position = offset
+        while position < end:
+            block_end = min(position + block, end)
+            data = self.cache.get(self.cache_key, position // block)
+            if data is not None and len(data) == block_end - position:
+                if run_start is not None:
+                    yield run_start, position - run_start, None
+                    run_start = None
+                yield position, len(data), data
+            elif run_start is None:
+                run_start = position
+            position = block_end
+        if run_start is not None:
+            yield run_start, end - run_start, None
+
+    def fetch_chunk(self, f, index, started):
+        for offset, length, data in self.pieces(index * self.chunk_size, self.chunk_length(index)):
+            if data is None:
+                self.fetch_range(f, offset, length, started)
+            else:
+                f.seek(offset)
+                f.write(data)
+                with self.lock:
+                    self.reused += length
+        # Data on disk before the journal says so, a crash can only lose work, never corrupt the file
+        f.flush()
+        os.fsync(f.fileno())
+        with self.lock:
+            self.done.add(index)
+            self.save_journal()
+
+    def fetch_range(self, f, offset, length, started):
+        response = self.session.get(self.url, headers={'Range': f'bytes={offset}-{offset + length - 1}'},
+                                    stream=True, timeout=30)
+        try:
+            if response.status_code != 206:
+                raise IOError(f"HTTP {response.status_code} for a range request")
+            f.seek(offset)
+            received = 0
+            last_report = time.monotonic()
+            for block in response.iter_content(256 * 1024):
+                block = block[:length - received]
+                f.write(block)
+                received += len(block)
+                with self.lock:
+                    self.downloaded += len(block)
+                if time.monotonic() - last_report > 0.5:
+                    last_report = time.monotonic()
+                    self.report('downloading', started)
+                if received >= length:
+                    break
+            if received < length:
+                raise IOError(f"Range at {offset} ended after {received} of {length} bytes")
+        finally:
+            response.close()
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+import threading
+import builtins
+import time
+import sys
+
+class StartupProfiler:
+    """Times first-time imports and construction phases on the main thread (python run.py --profile-startup)"""
+    BUDGET_MS = 1500  # cold start to first paint we want to stay under
+
+    def __init__(self):
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.imports = []  # (module, seconds) for the outermost first import of each module
+        self.phases = []  # (name, seconds)
+        self.marks = []  # (name, seconds since start)
+        self.depth = 0
+        self.reported = False
+
+    def enable(self):
+        self.enabled = True
+        self.start = time.perf_counter()
+        original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Only the outermost import of a not-yet-loaded module is timed, so nothing is counted twice
+            if (level or self.depth or name in sys.modules
+                    or threading.current_thread() is not threading.main_thread()):
+                return original_import(name, globals, locals, fromlist, level)
+            self.depth += 1
+            started = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self.depth -= 1
+                self.imports.append((name, time.perf_counter() - started))
+
+        builtins.__import__ = timed_import
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark(self, name):
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        lines = ["", f"Startup profile (budget {self.BUDGET_MS} ms)", "  Imports:"]
+        for name, seconds in sorted(self.imports, key=lambda i: i[1], reverse=True)[:20]:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {name}")
+        lines.append(f"    {sum(s for _, s in self.imports) * 1000:8.1f} ms  total")
+        lines.append("  Phases:")
+        for name, seconds in self.phases:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {name}")
+        lines.append("  Milestones:")
+        for name, seconds in self.marks:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {name}")
+        first_paint = next((s for n, s in self.marks if n == 'first paint'), None)
+        if first_paint is not None:
+            verdict = "OK" if first_paint * 1000 <= self.BUDGET_MS else "OVER BUDGET"
+            lines.append(f"  First paint after {first_paint * 1000:.0f} ms - {verdict}")
+        print("\n".join(lines))
+
+profiler = StartupProfiler()
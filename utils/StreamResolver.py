@@ -0,0 +1,80 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from utils.ResolveWorker import ResolveWorker
+from utils.Prefetcher import Prefetcher
+from utils.PlaybackTracer import tracer
+
+class StreamResolver(QObject):
+    """Resolves video IDs to yt-dlp info dicts in the background and drops stale results"""
+    resolved = pyqtSignal(str, object)  # video id, info dict
+    failed = pyqtSignal(str, str)  # video id, error
+    worker_class = ResolveWorker  # swapped for a fake by the benchmark harness
+
+    def __init__(self, ydl_opts, cache=None, parent=None):
+        super().__init__(parent)
+        self.request_id = 0
+        self.cache = cache
+        self.adopted = None  # (request_id, video_id) waiting on a prefetch already in flight
+        self.worker = self.worker_class(ydl_opts, cache, warm=True)
+        self.worker.resolved.connect(self.on_worker_resolved)
+        self.worker.failed.connect(self.on_worker_failed)
+        self.worker.start()
+        # Speculative resolves share the cache but run on their own low priority worker
+        self.prefetcher = Prefetcher(ydl_opts, cache, worker_class=self.worker_class, parent=self) if cache else None
+        if self.prefetcher:
+            self.prefetcher.prefetched.connect(self.on_prefetched)
+
+    def resolve(self, video_id):
+        """Queue a resolve, superseding whatever was requested before"""
+        self.request_id += 1
+        self.adopted = None
+        # A fresh in-memory hit skips the worker entirely so VLC can start at once
+        info = self.cache.get(video_id, memory_only=True) if self.cache else None
+        if info:
+            print(f"Using cached video info for: {video_id}")
+            tracer.instant('resolve: memory cache hit', video_id)
+            self.worker.cancel(self.request_id)
+            self.resolved.emit(video_id, info)
+            return self.request_id
+        # Prefetches compete for the GIL and the link, so only one already resolving this video survives
+        if self.prefetcher and self.prefetcher.cancel_except(video_id):
+            print(f"Waiting on prefetch for: {video_id}")
+            tracer.instant('resolve: adopted prefetch', video_id)
+            self.adopted = (self.request_id, video_id)
+            self.worker.cancel(self.request_id)
+            return self.request_id
+        self.worker.submit(self.request_id, video_id)
+        return self.request_id
+
+    def cancel(self):
+        self.request_id += 1
+        self.adopted = None
+        self.worker.cancel(self.request_id)
+
+    def shutdown(self):
+        self.worker.stop()
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        self.worker.wait(3000)
+
+    def on_prefetched(self, video_id, info):
+        if self.adopted != (self.request_id, video_id):
+            return
+        self.adopted = None
+        if info:
+            tracer.instant('resolved by prefetch', video_id)
+            self.resolved.emit(video_id, info)
+        else:
+            # The prefetch failed or was cut short, resolve it properly
+            self.worker.submit(self.request_id, video_id)
+
+    def on_worker_resolved(self, request_id, video_id, info):
+        if request_id != self.request_id:
+            print(f"Dropping stale result for: {video_id}")
+            return
+        tracer.instant('resolved', video_id)
+        self.resolved.emit(video_id, info)
+
+    def on_worker_failed(self, request_id, video_id, error):
+        if request_id != self.request_id:
+            return
+        self.failed.emit(video_id, error)
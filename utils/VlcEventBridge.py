@@ -0,0 +1,129 @@
+from PyQt5.QtCore import QObject, QTimer, QMetaObject, Qt, pyqtSignal, pyqtSlot
+import threading
+import time
+import vlc
+from utils.PlaybackTracer import tracer
+
+class VlcEventBridge(QObject):
+    """Turns libVLC callbacks into coalesced Qt signals on the GUI thread
+
+    libVLC calls back on its own threads and is not reentrant, so the callbacks only
+    store the newest values and queue one flush per burst; widgets never see VLC's thread.
+    """
+    time_changed = pyqtSignal(int)  # ms, at most once per min_interval
+    length_changed = pyqtSignal(int)  # ms
+    state_changed = pyqtSignal(str)  # opening, playing, paused, stopped or error
+    buffering = pyqtSignal(float)  # cache fill percent
+    stalled = pyqtSignal(int)  # ms spent rebuffering after the first fill, summed per flush
+    end_reached = pyqtSignal()
+
+    def __init__(self, media_player, min_interval=250, parent=None):
+        super().__init__(parent)
+        self.min_interval = min_interval  # ms between time_changed emissions, the slider can't show more
+        self.lock = threading.Lock()
+        self.pending = {}  # newest value per kind, written on VLC threads
+        self.queued = False
+        self.last_time_emit = 0
+        self.trace_cache = None  # last buffering percent, only tracked for the tracer
+        self.filled = False  # first fill of this media done, later buffering is a stall
+        self.stall_started = None
+        # Holds back a too-early time update instead of dropping it
+        self.time_timer = QTimer(self)
+        self.time_timer.setSingleShot(True)
+        self.time_timer.timeout.connect(self.flush)
+
+        self.events = media_player.event_manager()
+        handlers = {
+            vlc.EventType.MediaPlayerTimeChanged: self.on_time_changed,
+            vlc.EventType.MediaPlayerLengthChanged: lambda e: self.post('length', e.u.new_length),
+            vlc.EventType.MediaPlayerBuffering: self.on_buffering,
+            vlc.EventType.MediaPlayerOpening: self.on_opening,
+            vlc.EventType.MediaPlayerPlaying: lambda e: self.post_state('playing'),
+            vlc.EventType.MediaPlayerPaused: lambda e: self.post_state('paused'),
+            vlc.EventType.MediaPlayerStopped: lambda e: self.post_state('stopped'),
+            vlc.EventType.MediaPlayerEncounteredError: lambda e: self.post_state('error'),
+            vlc.EventType.MediaPlayerEndReached: lambda e: self.post('end', True),
+        }
+        for event_type, handler in handlers.items():
+            self.events.event_attach(event_type, handler)
+
+    # --- libVLC threads ---
+
+    def post(self, kind, value):
+        with self.lock:
+            self.pending[kind] = value
+            if self.queued:
+                return
+            self.queued = True
+        QMetaObject.invokeMethod(self, 'flush', Qt.QueuedConnection)
+
+    def post_state(self, state):
+        if state in ('opening', 'playing'):
+            tracer.instant(f'vlc {state}')
+        self.post('state', state)
+
+    def on_opening(self, event):
+        self.filled = False
+        self.stall_started = None
+        self.post_state('opening')
+
+    def on_time_changed(self, event):
+        tracer.first_frame()
+        self.post('time', event.u.new_time)
+
+    def on_buffering(self, event):
+        cache = event.u.new_cache
+        if tracer.enabled:
+            # Fires for every percent, keep the first and the one that completes the fill
+            if self.trace_cache is None or (cache >= 100 and self.trace_cache < 100):
+                tracer.instant('vlc buffering', cache=round(cache))
+            self.trace_cache = None if cache >= 100 else cache
+        # Timed here rather than on the GUI thread, a short stall can start and end within one flush
+        if cache >= 100:
+            if self.stall_started is not None:
+                stall = int((time.monotonic() - self.stall_started) * 1000)
+                self.stall_started = None
+                with self.lock:
+                    stall += self.pending.get('stall', 0)
+                self.post('stall', stall)
+            self.filled = True
+        elif self.filled and self.stall_started is None:
+            self.stall_started = time.monotonic()
+        self.post('buffering', cache)
+
+    # --- GUI thread ---
+
+    def clear(self):
+        """Forget anything still queued from the previous media"""
+        with self.lock:
+            self.pending = {}
+        self.time_timer.stop()
+        self.trace_cache = None
+
+    @pyqtSlot()
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.queued = False
+        if 'length' in pending:
+            self.length_changed.emit(pending['length'])
+        if 'state' in pending:
+            self.state_changed.emit(pending['state'])
+        if 'buffering' in pending:
+            self.buffering.emit(pending['buffering'])
+        if 'stall' in pending:
+            self.stalled.emit(pending['stall'])
+        if 'time' in pending:
+            wait = self.min_interval - (time.monotonic() - self.last_time_emit) * 1000
+            if wait > 0:
+                with self.lock:
+                    self.pending.setdefault('time', pending['time'])  # unless a newer one came in meanwhile
+                if not self.time_timer.isActive():
+                    self.time_timer.start(int(wait) + 1)
+            else:
+                self.last_time_emit = time.monotonic()
+                self.time_changed.emit(pending['time'])
+        if 'end' in pending:
+            self.clear()  # no position updates after the end
+            self.end_reached.emit()